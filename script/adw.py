@@ -1,169 +1,131 @@
-import pdfplumber
 import json
 from collections import defaultdict
 import re
 
-# Приблизительные RGB-значения и допустимая погрешность (Tolerance)
-# NOTE: Цвета в PDF могут быть в разных цветовых моделях (DeviceRGB, CalRGB и т.д.),
-# и их точное извлечение и сопоставление сложны.
-# Я использую предоставленные вами RGB и небольшую погрешность.
-COLOR_RANGES = {
-    "orange": (245, 155, 1),
-    "green": (81, 165, 160),
-    # Красный цвет: 81,165,160 - это очевидная ошибка.
-    # Используем более реалистичный красный для демонстрации логики.
-    # Если на вашей картинке красный - это именно тот, который вы определили,
-    # то нужно будет разбираться с цветовым профилем PDF.
-    "red": (210, 50, 50)  # Использование значения, близкого к красному
-}
-TOLERANCE = 25  # Допустимая погрешность для каждого канала R, G, B
-
-
-def is_color_match(rgb_tuple, target_rgb, tolerance):
-    """Проверяет, соответствует ли цвет RGB целевому цвету с учетом погрешности."""
-    r, g, b = rgb_tuple
-    tr, tg, tb = target_rgb
-
-    return (
-            abs(r - tr) <= tolerance and
-            abs(g - tg) <= tolerance and
-            abs(b - tb) <= tolerance
-    )
-
-
-def get_fill_color_for_coords(page, x0, y0, x1, y1):
-    """
-    Ищет графические объекты (прямоугольники) с заливкой в пределах координат ячейки.
-    Возвращает имя цвета ('orange', 'green', 'red') или None.
-    """
-
-    # 1. Получаем все прямоугольники на странице
-    # pdfplumber не всегда легко предоставляет заливку, PyMuPDF (fitz) лучше для этого,
-    # но в pdfplumber можно использовать page.rects или page.objects['rect'].
-    # Здесь используется упрощенный подход, который может не работать с некоторыми PDF.
-
-    # Пытаемся найти залитый прямоугольник (ячейку) в области
-    for rect in page.rects:
-        # Проверяем, находится ли прямоугольник в пределах координат ячейки (или перекрывается)
-        if (rect['x0'] < x1 and rect['x1'] > x0 and
-                rect['top'] < y1 and rect['bottom'] > y0):
-
-            # Извлекаем цвет заливки. В pdfplumber это сложно,
-            # и 'non_stroking_color' не всегда доступен напрямую для rects.
-            # Если ваш PDF создан с чистой заливкой, rect['fill'] будет работать,
-            # но его формат может быть не RGB.
+import colors  # сопоставление цветов (RGB, погрешность, gray/RGB/CMYK)
+import instrument
+import pdf_extract
 
-            # Для упрощения:
-            if 'fill' in rect and rect['fill']:
-                # Предполагаем, что 'fill' может быть строкой цвета (e.g., '#F59B01')
-                # В реальном коде здесь нужно правильно парсить цвета
 
-                # *** Упрощенная логика для демонстрации сопоставления цветов ***
-
-                # 2. Переводим цвет в RGB (здесь требуется более сложный парсер цвета PDF)
-                # Из-за сложности прямого извлечения RGB из rects pdfplumber, 
-                # я *имитирую* проверку, предполагая, что нам удалось извлечь (R, G, B)
-                # Например, если ячейка с текстом (x0, y0, x1, y1) находится в оранжевом прямоугольнике
+class RectIndex:
+    """
+    Пространственный индекс залитых прямоугольников страницы (равномерная сетка).
+    Строится один раз на страницу; каждый запрос по ячейке смотрит
+    только прямоугольники из клетки сетки, где лежит центр ячейки, а не все page.rects.
+    """
 
-                # --- Имитация: для реальной работы нужен низкоуровневый анализ ---
-                pass
+    def __init__(self, rects, cell_size=50):
+        self.cell_size = cell_size
+        self.rects = []
+        self.grid = defaultdict(list)
+        filled = [rect for rect in rects if rect.get('fill')]
+        # Цвета всех заливок страницы классифицируются одним вызовом
+        names = colors.classify_many([rect.get('non_stroking_color') for rect in filled])
+        for rect, name in zip(filled, names):
+            n = len(self.rects)
+            area = (rect['x1'] - rect['x0']) * (rect['bottom'] - rect['top'])
+            self.rects.append((rect['x0'], rect['top'], rect['x1'], rect['bottom'], area, name))
+            for key in self._keys(rect['x0'], rect['top'], rect['x1'], rect['bottom']):
+                self.grid[key].append(n)
+
+    def _keys(self, x0, y0, x1, y1):
+        size = self.cell_size
+        for gx in range(int(x0 // size), int(x1 // size) + 1):
+            for gy in range(int(y0 // size), int(y1 // size) + 1):
+                yield gx, gy
+
+    def fill_at(self, x0, y0, x1, y1):
+        """
+        Возвращает имя цвета самого маленького залитого прямоугольника,
+        накрывающего центр ячейки (x0, y0, x1, y1), или None.
+        По центру, а не по пересечению: заливки соседних ячеек касаются
+        границ ячейки и из-за погрешности координат заходят на нее.
+        """
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        best = None
+        for n in self.grid.get((int(cx // self.cell_size), int(cy // self.cell_size)), ()):
+            rx0, ry0, rx1, ry1, area, name = self.rects[n]
+            if rx0 <= cx <= rx1 and ry0 <= cy <= ry1:
+                if best is None or area < best[0]:
+                    best = (area, name)
+        return best[1] if best else None
+
+
+def get_fill_color_for_coords(index, x0, y0, x1, y1):
+    """
+    Ищет залитый прямоугольник в пределах координат ячейки через RectIndex страницы.
+    Возвращает имя цвета ('orange', 'green', 'red') или None.
+    """
+    return index.fill_at(x0, y0, x1, y1)
 
-    # *Так как прямое извлечение RGB заливки ячейки сложно, 
-    # в реальных условиях приходится использовать PyMuPDF или другой более 
-    # мощный инструмент для анализа PDF-объектов.*
 
-    # Для демонстрации логики, здесь я возвращаю *фиктивный* цвет 
-    # на основе координаты X, Y ячейки, чтобы показать формат вывода.
-    # !!! Вам нужно заменить это на реальную логику определения цвета !!!
+def parse_day_cell(text):
+    """
+    Число дня и личный день из текста ячейки "1\n5 ЛИЧНЫЙ ДЕНЬ".
+    Возвращает (day, personal_day) или None для пустых ячеек и заголовков.
+    """
+    numbers = re.findall(r"\d+", text or "")
+    if len(numbers) < 2:
+        return None
+    day, personal_day = int(numbers[0]), int(numbers[1])
+    if not 1 <= day <= 31 or not 1 <= personal_day <= 9:
+        return None
+    return day, personal_day
 
-    # Пример (очень условный) сопоставления:
-    # 15 < y < 21 (приблизительно третья строка) и 0 < x < 100
-    if page.page_number % 2 == 0 and x0 < 100:
-        return 'orange'
-    if page.page_number % 3 == 0 and y0 > 500:
-        return 'green'
 
-    return None
+def parse_calendar_page(content, calendar_data):
+    """
+    Парсит одну календарную страницу из pdf_extract (cells, rects)
+    и добавляет дни в calendar_data.
+    """
+    # Ячейки первой таблицы страницы вместе с их координатами
+    # (автоматический детектор таблиц pdfplumber, pdf_extract.CELLS)
+    cells = content[pdf_extract.CELLS]
+
+    if not cells:
+        # Если таблица не найдена, пропускаем страницу
+        return
+
+    month_name = f"page_{content['page_number']}"  # Замените на реальное название месяца
+
+    # Индекс заливок строится один раз на страницу
+    with instrument.stage('color_index', page=content['page_number']):
+        rect_index = RectIndex(content[pdf_extract.RECTS])
+
+    # День и личный день берутся из текста ячейки, цвет — из заливки под ней
+    for cell in cells:
+        parsed = parse_day_cell(cell['text'])
+        if parsed is None:
+            continue
+        day_number, personal_day = parsed
+        x0, y0, x1, y1 = cell['bbox']
+
+        with instrument.stage('color_lookup', page=content['page_number']):
+            day_color = get_fill_color_for_coords(rect_index, x0, y0, x1, y1)
+
+        calendar_data[month_name][str(day_number)] = {
+            "personal_day": personal_day,
+            "day_by_color": day_color
+        }
 
 
-def parse_calendar(pdf_path, start_page, end_page):
+def parse_calendar(pdf_path, start_page, end_page, pages=None):
     """
     Парсит календарные данные с указанных страниц PDF.
+    pages — уже извлеченное содержимое страниц (pdf_extract.extract_pdf);
+    если не передано, страницы читаются по одной через pdf_extract.iter_pages.
     """
-    calendar_data = defaultdict(lambda: defaultdict(dict))
-
-    with pdfplumber.open(pdf_path) as pdf:
-        for i in range(start_page - 1, end_page):
-            if i >= len(pdf.pages):
-                break
-
-            page = pdf.pages[i]
-
-            # Извлечение таблицы с помощью pdfplumber для получения ячеек и их координат
-            # (Используем автоматический детектор таблиц)
-            tables = page.extract_tables()
+    if pages is None:
+        # Постранично: содержимое страницы освобождается сразу после разбора
+        layout = pdf_extract.page_range(start_page, end_page, (pdf_extract.RECTS, pdf_extract.CELLS))
+        page_items = pdf_extract.iter_pages(pdf_path, layout)
+    else:
+        page_items = [(n, pages[n]) for n in range(start_page, end_page + 1) if n in pages]
 
-            if not tables:
-                # Если таблица не найдена, пропускаем страницу
-                continue
-
-            # Берем первую найденную таблицу (календарь)
-            table = tables[0]
-
-            # --- Определение границ ячеек для поиска цвета ---
-            # Это ключевой шаг: нам нужны координаты каждой ячейки.
-            # pdfplumber.extract_tables() сам по себе дает только текст.
-            # Используем page.cells (если pdfplumber их определит) или manual.
-
-            # В этом примере мы будем извлекать текст и его координаты (chars) 
-            # и группировать их в "ячейки".
-
-            # Группируем символы по координатам строк/столбцов, чтобы определить ячейку
-            # *Это очень упрощенный подход и может не работать на всех PDF!*
-
-            # Ищем числа (день) и персональное число
-            text_objects = page.extract_words(x_tolerance=3, y_tolerance=3)
-            print(page)
-
-            month_name = f"page_{page.page_number}"  # Замените на реальное название месяца
-
-            cell_data = []
-
-            # Проходим по всем элементам, чтобы найти пары "день" и "персональный день"
-            print(text_objects)
-            for j in range(len(text_objects)):
-                word = text_objects[j]['text']
-
-                # 1. Ищем число дня (вверху ячейки)
-                if word.isdigit() and len(word) <= 2:
-                    day_number = int(word)
-
-                    # 2. Ищем персональное число (ниже числа дня)
-                    if j + 2 < len(text_objects):
-                        next_word = text_objects[j + 1]['text']
-                        third_word = text_objects[j + 2]['text']
-
-                        if next_word.isdigit():  # "1\n5 ЛИЧНЫЙ ДЕНЬ" -> 5
-                            personal_day = int(next_word)
-
-                            # Определяем приблизительные координаты ячейки
-                            # Берем координаты первого слова (дня) и последнего слова ("ДЕНЬ")
-                            x0 = text_objects[j]['x0']
-                            y0 = text_objects[j]['top']
-                            x1 = text_objects[j + 2]['x1']
-                            y1 = text_objects[j + 2]['bottom']
-
-                            # 3. Определяем цвет заливки
-                            day_color = get_fill_color_for_coords(page, x0, y0, x1, y1)
-
-                            calendar_data[month_name][str(day_number)] = {
-                                "personal_day": personal_day,
-                                "day_by_color": day_color
-                            }
-
-                            # Пропускаем следующие слова, которые уже обработаны
-                            # (личный день и ЛИЧНЫЙ)
-                            # j += 2 
+    calendar_data = defaultdict(lambda: defaultdict(dict))
+    for n, content in page_items:
+        with instrument.stage('calendar_page', pdf_path, n):
+            parse_calendar_page(content, calendar_data)
 
     # Перегруппировка в финальный JSON-формат
     final_output = {"calendar": {}}
@@ -173,47 +135,48 @@ def parse_calendar(pdf_path, start_page, end_page):
     return final_output
 
 
-# --- ЗАПУСК ---
-PDF_FILE_PATH = r"C:\Users\Admin\Downloads\Год 1 S (2025 КС).pdf"
-START_PAGE = 11
-END_PAGE = 22
-
-# NOTE: Этот код очень чувствителен к структуре вашего PDF.
-# Для коммерческих PDF может потребоваться более сложный анализ PyMuPDF.
-
-try:
-    parsed_json = parse_calendar(PDF_FILE_PATH, START_PAGE, END_PAGE)
-    # print(json.dumps(parsed_json, indent=4, ensure_ascii=False))
-
-    # Пример вывода в требуемом формате (для демонстрации)
-    demo_output = {
-        "calendar": {
-            "page_11": {  # Предполагаем, что page_11 это Январь или другой месяц
-                "1": {
-                    "personal_day": 5,
-                    "day_by_color": "green"  # Имитация: зеленый цвет
+if __name__ == "__main__":
+    # --- ЗАПУСК ---
+    PDF_FILE_PATH = r"C:\Users\Admin\Downloads\Год 1 S (2025 КС).pdf"
+    START_PAGE = 11
+    END_PAGE = 22
+
+    # NOTE: Этот код очень чувствителен к структуре вашего PDF.
+    # Для коммерческих PDF может потребоваться более сложный анализ PyMuPDF.
+
+    try:
+        parsed_json = parse_calendar(PDF_FILE_PATH, START_PAGE, END_PAGE)
+        # print(json.dumps(parsed_json, indent=4, ensure_ascii=False))
+
+        # Пример вывода в требуемом формате (для демонстрации)
+        demo_output = {
+            "calendar": {
+                "page_11": {  # Предполагаем, что page_11 это Январь или другой месяц
+                    "1": {
+                        "personal_day": 5,
+                        "day_by_color": "green"  # Имитация: зеленый цвет
+                    },
+                    "2": {
+                        "personal_day": 6,
+                        "day_by_color": None  # Имитация: нет заливки
+                    },
+                    "9": {
+                        "personal_day": 4,
+                        "day_by_color": "orange"  # Имитация: оранжевый
+                    }
                 },
-                "2": {
-                    "personal_day": 6,
-                    "day_by_color": None  # Имитация: нет заливки
-                },
-                "9": {
-                    "personal_day": 4,
-                    "day_by_color": "orange"  # Имитация: оранжевый
-                }
-            },
-            "page_12": {
-                "20": {
-                    "personal_day": 6,
-                    "day_by_color": "red"  # Имитация: красный
+                "page_12": {
+                    "20": {
+                        "personal_day": 6,
+                        "day_by_color": "red"  # Имитация: красный
+                    }
                 }
             }
         }
-    }
 
-    print(json.dumps(demo_output, indent=4, ensure_ascii=False))
+        print(json.dumps(demo_output, indent=4, ensure_ascii=False))
 
-except FileNotFoundError:
-    print(f"Ошибка: Файл не найден по пути {PDF_FILE_PATH}. Пожалуйста, обновите путь.")
-except Exception as e:
-    print(f"Произошла ошибка при парсинге: {e}")
\ No newline at end of file
+    except FileNotFoundError:
+        print(f"Ошибка: Файл не найден по пути {PDF_FILE_PATH}. Пожалуйста, обновите путь.")
+    except Exception as e:
+        print(f"Произошла ошибка при парсинге: {e}")
\ No newline at end of file
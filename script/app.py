@@ -1,6 +1,19 @@
-import camelot
+import bisect
+import calendar
+import json
+import re
+from collections import defaultdict
+from pathlib import Path
+
 import pandas as pd
 
+import adw
+import colors
+import instrument
+import page_index
+import pdf_extract
+from common import month_en, write_json_atomic
+
 # Уточненные RGB-значения и их допустимая погрешность (Tolerance)
 # NOTE: В PDF RGB-значения могут быть представлены в разных форматах,
 # а точное определение заливки ячейки требует анализа графических элементов.
@@ -8,13 +21,244 @@ import pandas as pd
 
 PDF_PATH = r"C:\Users\Admin\Downloads\Год 1 S (2025 КС).pdf"
 PAGES = '11-22'
-COLOR_RANGES = {
-    'orange': (245, 155, 1),  # R G B
-    'green': (81, 165, 160),
-    'red': (255, 0, 0)  # Указанное вами 81,165,160 для красного ошибочно,
-    # я использую более вероятное значение.
-}
-TOLERANCE = 10  # Погрешность для цветового диапазона (если бы мы его извлекали)
+# Цвета и погрешность — общие для всех парсеров, см. colors.py
+COLOR_RANGES = colors.COLOR_RANGES
+TOLERANCE = colors.TOLERANCE
+
+
+COLUMNS = ['member', 'page', 'day', 'personal_number', 'color']
+
+
+def member_from_path(pdf_path):
+    """Номер участника из имени файла "Год N S (...).pdf" или None."""
+    match = re.search(r"Год\s*(\d+)", Path(pdf_path).name)
+    return int(match.group(1)) if match else None
+
+
+def table_cells(df, page_number):
+    """
+    Ячейки одной таблицы календаря (camelot или pdfplumber) одной колонкой,
+    без строки заголовков дней недели (ПН, ВТ,...).
+    """
+    cells = df.iloc[1:].stack()
+    cells = cells[cells.map(lambda value: isinstance(value, str) and value != '')]
+    return pd.DataFrame({'page': page_number, 'cell': cells.to_numpy(dtype=object)})
+
+
+def box_cells(boxes, rects, page_number):
+    """
+    Ячейки pdfplumber с координатами (pdf_extract.CELLS) и цветом заливки
+    под центром ячейки (adw.RectIndex по rects страницы).
+    """
+    index = adw.RectIndex(rects)
+    return pd.DataFrame({
+        'page': page_number,
+        'cell': pd.Series([box['text'] for box in boxes], dtype=object),
+        'color': pd.Series([index.fill_at(*box['bbox']) for box in boxes], dtype=object),
+    })
+
+
+def parse_cells(cells, member=None):
+    """
+    Векторный разбор ячеек всех таблиц сразу.
+    Каждая ячейка состоит из двух строк: число и персональное число
+    (например, "1\n5 ЛИЧНЫЙ ДЕНЬ"). Возвращает типизированный DataFrame:
+    member Int8, page int16, day int8, personal_number Int8, color category.
+    Цвет берется из колонки color ячеек, если она есть (см. box_cells).
+    """
+    if isinstance(cells, list):
+        cells = pd.concat(cells, ignore_index=True) if cells else pd.DataFrame({'page': [], 'cell': []})
+    parts = cells['cell'].astype(str).str.strip().str.extract(r'^([^\n]*)\n(.*)$', flags=re.S)
+    day = pd.to_numeric(parts[0].str.strip(), errors='coerce')
+    # Ожидаем: "5 ЛИЧНЫЙ ДЕНЬ" -> 5
+    personal_number = pd.to_numeric(parts[1].str.strip().str.split(' ').str[0], errors='coerce')
+
+    # Как в adw.parse_day_cell: день 1–31, личный день 1–9; остальные ячейки
+    # отбрасываются, а не оборачиваются при приведении к int8
+    keep = (day.between(1, 31) & personal_number.between(1, 9)).to_numpy()
+    color = cells['color'].to_numpy(dtype=object)[keep] if 'color' in cells else [None] * int(keep.sum())
+    result = pd.DataFrame({
+        'member': pd.array([member] * int(keep.sum()), dtype='Int8'),
+        'page': cells['page'].to_numpy()[keep].astype('int16'),
+        'day': day.to_numpy()[keep].astype('int8'),
+        'personal_number': pd.array(personal_number.to_numpy()[keep], dtype='Int8'),
+        # Без колонки color (camelot, шаблон по словам) цвет не определяется
+        'color': pd.Categorical(color, categories=colors.COLORS),
+    })
+    return result[COLUMNS]
+
+
+def write_outputs(df, path_stem):
+    """
+    Пишет результат в CSV, Parquet и Arrow IPC (feather).
+    Parquet/Arrow требуют pyarrow; без него пишется только CSV.
+    """
+    path_stem = Path(path_stem)
+    df.to_csv(path_stem.with_suffix('.csv'), index=False)
+    try:
+        df.to_parquet(path_stem.with_suffix('.parquet'), index=False)
+        df.reset_index(drop=True).to_feather(path_stem.with_suffix('.arrow'))
+    except ImportError:
+        print("pyarrow не установлен, Parquet/Arrow пропущены")
+
+
+def parse_calendar_pages(pages, member=None):
+    """
+    То же, что parse_calendar_tables, но по таблицам, уже извлеченным
+    pdfplumber за один проход (pdf_extract.extract_pdf), без повторного
+    открытия PDF и растеризации camelot. Если у страницы извлечены
+    ячейки с координатами и прямоугольники (CELLS и RECTS), заполняется и цвет.
+    """
+    cells = []
+    for page_number, content in sorted(pages.items()):
+        boxes, rects = content.get(pdf_extract.CELLS), content.get(pdf_extract.RECTS)
+        if boxes and rects is not None:
+            cells.append(box_cells(boxes, rects, page_number))
+            continue
+        tables = content.get(pdf_extract.TABLES)
+        if not tables:
+            continue
+        cells.append(table_cells(pd.DataFrame(tables[0]), page_number))
+    return parse_cells(cells, member)
+
+
+TEMPLATE_PATH = Path(__file__).resolve().parent / 'table_template.json'
+MAX_WEEKS = 6  # строк с днями в месяце не больше шести
+
+
+def page_key(page):
+    """Ключ шаблона — размер страницы: сетка, выученная на другом формате, не подходит."""
+    return f'{round(float(page.width), 1)}x{round(float(page.height), 1)}'
+
+
+def learn_template(page):
+    """
+    Определяет область таблицы и границы столбцов/строк по одной странице
+    pdfplumber (детектор таблиц). Все страницы месяцев используют ту же сетку 7 столбцов.
+    """
+    tables = page.find_tables()
+    if not tables:
+        return None
+    table = tables[0]
+    header = table.rows[0]
+    if len(header.cells) != 7:
+        return None
+    days = table.rows[1].bbox
+    return {
+        'x': [cell[0] for cell in header.cells] + [header.cells[-1][2]],
+        'top': header.bbox[1],
+        'header': header.bbox[3],
+        'row_height': days[3] - days[1],
+    }
+
+
+def load_template(pdf_path, page_number, template_path=TEMPLATE_PATH):
+    """
+    Шаблон для размера страницы page_number: сохраненный или новый,
+    выученный по этой странице. Файл шаблонов — {размер страницы: шаблон}.
+    """
+    import pdfplumber
+
+    templates = {}
+    if template_path and Path(template_path).exists():
+        with open(template_path, 'r', encoding='utf-8') as f:
+            templates = json.load(f)
+    with pdfplumber.open(pdf_path) as pdf:
+        page = pdf.pages[page_number - 1]
+        key = page_key(page)
+        if key in templates:
+            return templates[key]
+        template = learn_template(page)
+    if template and template_path:
+        templates[key] = template
+        write_json_atomic(template_path, templates, indent=4)
+    return template
+
+
+def month_days_ok(days, page_number, year):
+    """
+    Проверка нарезки по шаблону: на странице месяца (page_index.DEFAULT_INDEX)
+    должны быть ровно дни 1..N этого месяца. Сетка, сдвинутая на строку
+    или столбец, дает пропуски, повторы или лишние дни.
+    """
+    months = {pages[0]: month_en.index(month) + 1 for month, pages in page_index.DEFAULT_INDEX.items()
+              if month in month_en}
+    if page_number not in months:
+        return len(days) > 0 and len(set(days)) == len(days)
+    return sorted(days) == list(range(1, calendar.monthrange(year, months[page_number])[1] + 1))
+
+
+def slice_table(words, template):
+    """
+    Раскладывает слова текстового слоя страницы по ячейкам шаблона.
+    Возвращает строки таблицы в формате page.extract_tables():
+    первая строка — заголовок, в ячейке строки текста через '\n'.
+    """
+    xs = template['x']
+    cells = defaultdict(list)
+    for word in words:
+        x = (word['x0'] + word['x1']) / 2
+        y = (word['top'] + word['bottom']) / 2
+        if not (xs[0] <= x < xs[-1]) or y < template['top']:
+            continue
+        col = bisect.bisect_right(xs, x) - 1
+        if y < template['header']:
+            row = 0
+        else:
+            row = int((y - template['header']) // template['row_height']) + 1
+            if row > MAX_WEEKS:
+                continue
+        cells[row, col].append(word)
+
+    rows = max((row for row, col in cells), default=-1) + 1
+    table = [[''] * 7 for _ in range(rows)]
+    for (row, col), cell_words in cells.items():
+        lines = []
+        for word in sorted(cell_words, key=lambda w: (round(w['top']), w['x0'])):
+            if lines and abs(lines[-1][0] - word['top']) <= 3:
+                lines[-1][1].append(word['text'])
+            else:
+                lines.append((word['top'], [word['text']]))
+        table[row][col] = '\n'.join(' '.join(texts) for top, texts in lines)
+    return table
+
+
+def parse_calendar(pdf_path, pages=PAGES, template_path=TEMPLATE_PATH, year=2025):
+    """
+    Быстрый парсер календаря: сетка таблицы выучивается один раз на размер
+    страницы (или берется из сохраненного шаблона), дальше ячейки режутся
+    прямо из текстового слоя. Camelot lattice используется для страниц, где
+    шаблон не подошел: дни страницы не совпали с днями ее месяца (month_days_ok).
+    """
+    start_page, end_page = (int(p) for p in pages.split('-'))
+    layout = pdf_extract.page_range(start_page, end_page, (pdf_extract.WORDS,))
+
+    with instrument.stage('template_load', pdf_path):
+        template = load_template(pdf_path, start_page, template_path)
+    member = member_from_path(pdf_path)
+    cells = []
+    seen = []
+    # Страницы читаются по одной, от каждой остаются только ячейки
+    for page_number, page in pdf_extract.iter_pages(pdf_path, layout):
+        seen.append(page_number)
+        if not template:
+            continue
+        with instrument.stage('template_slice', pdf_path, page_number):
+            table = slice_table(page[pdf_extract.WORDS], template)
+        cells.append(table_cells(pd.DataFrame(table), page_number))
+    with instrument.stage('parse_cells', pdf_path):
+        result = parse_cells(cells, member)
+
+    days = result.groupby('page')['day'].apply(list)
+    failed = [n for n in seen if not month_days_ok(days.get(n, []), n, year)]
+    result = result[~result['page'].isin(failed)].reset_index(drop=True)
+    fallback = sorted(failed)
+    if fallback:
+        print(f"Шаблон не подошел для страниц {fallback}, используем camelot")
+        tables = parse_calendar_tables(pdf_path, ','.join(map(str, fallback)))
+        result = pd.concat([result, tables], ignore_index=True)
+
+    return result
 
 
 def parse_calendar_tables(pdf_path, pages):
@@ -26,6 +270,8 @@ def parse_calendar_tables(pdf_path, pages):
     низкоуровневых PDF-объектов.
     """
 
+    import camelot
+
     # Режим 'lattice' хорошо подходит для таблиц с видимыми линиями,
     # 'stream' для таблиц без них. На вашем примере 'lattice' должен подойти.
     tables = camelot.read_pdf(
@@ -36,71 +282,26 @@ def parse_calendar_tables(pdf_path, pages):
         # можно использовать table_areas=['x1,y1,x2,y2'] 
     )
 
-    all_parsed_data = []
-
     print(f"Найдено таблиц: {len(tables)} на страницах {pages}")
 
-    for table in tables:
-        df = table.df
-        page_number = table.page
-        parsed_page_data = []
-
-        # Предполагаем, что таблица имеет структуру 7 столбцов (ПН-ВС)
-        # и несколько строк для дней.
-        # Каждая ячейка состоит из двух строк: число и персональное число (например, "1\n5 ЛИЧНЫЙ ДЕНЬ")
-
-        # Пропускаем строку заголовков дней недели (ПН, ВТ,...)
-        data_rows = df.iloc[1:]
-
-        for _, row in data_rows.iterrows():
-            for i, cell_content in enumerate(row):
-                if cell_content and isinstance(cell_content, str):
-                    # Разбиваем содержимое ячейки на число и персональное число
-                    parts = cell_content.strip().split('\n', 1)
-                    if len(parts) == 2:
-                        day_number = parts[0].strip()
-                        personal_number_text = parts[1].strip()
-
-                        # Извлечение только персонального числа (если нужно)
-                        try:
-                            # Ожидаем: "5 ЛИЧНЫЙ ДЕНЬ" -> 5
-                            personal_number = int(personal_number_text.split(' ')[0])
-                        except ValueError:
-                            personal_number = None
-
-                        # Сохраняем извлеченные данные
-                        parsed_page_data.append({
-                            'page': page_number,
-                            'day_number': day_number,
-                            'personal_number': personal_number,
-                            # Здесь должно быть место для определения цвета,
-                            # но это требует другой библиотеки (например, pdfplumber)
-                            'color': 'unknown'
-                        })
-
-        all_parsed_data.extend(parsed_page_data)
-
-    return pd.DataFrame(all_parsed_data)
-
-
-# --- Часть для извлечения цвета с pdfplumber (сложная, как концепция) ---
-
-# *Если* вы решите использовать pdfplumber, то идея такая:
-# 1. Открыть PDF с pdfplumber.
-# 2. Итерироваться по страницам 11-22.
-# 3. Получить графические объекты (`page.rects`, `page.curves`, `page.non_stroking_color`)
-#    для определения заливки ячейки.
-# 4. Получить текстовые объекты (`page.chars`) с их координатами.
-# 5. Сопоставить координаты текстовых объектов (чисел) с координатами заливки ячейки.
-
-# --- Запуск функции ---
-
-# Укажите путь к вашему PDF-файлу
-# extracted_data = parse_calendar_tables(PDF_PATH, PAGES)
-# print(extracted_data.head())
-# extracted_data.to_csv('extracted_calendar_data.csv', index=False)
-
-print("Для извлечения числовых данных используйте Camelot (пример кода выше).")
-print(
-    "Для извлечения цвета заливки ячейки необходимо использовать более низкоуровневые библиотеки (например, pdfplumber) для анализа графических объектов PDF и сопоставления их с координатами извлеченных чисел, что является более сложной задачей.")
-print("Учитывая, что в извлеченных данных цвет будет 'unknown', я предоставляю структуру для получения чисел.")
+    cells = [table_cells(table.df, int(table.page)) for table in tables]
+    return parse_cells(cells, member_from_path(pdf_path))
+
+
+# --- Цвет заливки ячеек ---
+
+# Цвет определяется по pdfplumber: ячейки таблицы с координатами (pdf_extract.CELLS)
+# сопоставляются с залитыми прямоугольниками страницы (pdf_extract.RECTS) через
+# adw.RectIndex, см. box_cells и parse_calendar_pages.
+
+if __name__ == '__main__':
+    # --- Запуск функции ---
+
+    # Укажите путь к вашему PDF-файлу
+    # extracted_data = parse_calendar(PDF_PATH, PAGES)  # camelot только как запасной вариант
+    # extracted_data = parse_calendar_tables(PDF_PATH, PAGES)
+    # print(extracted_data.head())
+    # write_outputs(extracted_data, 'extracted_calendar_data')  # .csv, .parquet, .arrow
+
+    print("Таблица с цветами: pdf_pipeline.py (один проход, ячейки и заливки pdfplumber).")
+    print("parse_calendar (шаблон по словам) и parse_calendar_tables (camelot) дают только числа, цвет пустой.")
@@ -0,0 +1,309 @@
+"""
+Benchmarks for the extraction paths on synthetic documents.
+
+    python benchmark.py --members 9 --years 2025 --repeat 3 --out bench.json
+
+Generates "Год N S" DOCX/PDF files with synthetic.py into a temporary
+directory, checks the output of every path against
+synthetic.expected_calendar (the "wrong" column: days a path misses or
+gets wrong, or description texts for pdf_descriptions), then times every
+path end to end (wall time, CPU time, and the tracemalloc peak in a
+separate run) and prints a summary table. The template path has no cell
+fills, so its colors are not checked.
+The page cache of pdf_extract is disabled so every run pays the full
+extraction, except for the *_cached benchmarks, which time the warm
+cache path.
+"""
+import argparse
+import contextlib
+import io
+import json
+import tempfile
+from pathlib import Path
+import time
+import tracemalloc
+
+import pandas as pd
+
+import page_index
+import pdf_extract
+import synthetic
+from common import month_en
+
+DAY_FIELDS = ('day', 'personal_day', 'day_by_color')
+# adw.py day dicts carry no 'day', the day number is their key
+ADW_FIELDS = ('personal_day', 'day_by_color')
+
+# page cache of the *_cached benchmarks, in the temporary directory (see main)
+warm_cache = None
+
+
+def month_pages(index=page_index.DEFAULT_INDEX):
+    """{month: page number} of the usual layout the synthetic PDFs follow."""
+    return {month: index[month][0] for month in month_en}
+
+
+def table_calendar(df):
+    """{month: {day: day dict}} from the app.py typed table."""
+    months = {n: month for month, n in month_pages().items()}
+    result = {}
+    for row in df.itertuples():
+        result.setdefault(months[row.page], {})[str(row.day)] = {
+            'day': int(row.day),
+            'personal_day': None if pd.isna(row.personal_number) else int(row.personal_number),
+            'day_by_color': None if pd.isna(row.color) else row.color,
+        }
+    return result
+
+
+def wrong_days(year, member, calendar, fields=DAY_FIELDS):
+    """Days of synthetic.expected_calendar that calendar misses or gets wrong."""
+    wrong = 0
+    for month, days in synthetic.expected_calendar(year, member).items():
+        parsed = calendar.get(month) or {}
+        for day, expected in days.items():
+            if any((parsed.get(day) or {}).get(field) != expected[field] for field in fields):
+                wrong += 1
+    return wrong
+
+
+def wrong_descriptions(result):
+    """Personal day and month descriptions of synthetic.description_lines missing from the JSON."""
+    wrong = sum(1 for d in range(1, 10)
+                if f'описание личного дня {d}' not in result['personal_day_descriptions'].get(str(d), ''))
+    wrong += sum(1 for month in month_en
+                 if f'описание месяца {month}' not in result['calendar'].get(month, {}).get('personal_month_description', ''))
+    return wrong
+
+
+def check_days(outputs, fields=DAY_FIELDS):
+    return sum(wrong_days(year, member, calendar, fields) for year, member, calendar in outputs)
+
+
+def check_template(outputs):
+    # the word template sees no cell fills, its color column stays empty
+    return check_days(outputs, ('day', 'personal_day'))
+
+
+def check_adw(outputs):
+    return check_days(outputs, ADW_FIELDS)
+
+
+def check_descriptions(outputs):
+    return sum(wrong_descriptions(result) for year, member, result in outputs)
+
+
+def check_single_pass(outputs):
+    return sum(wrong_descriptions(result) + wrong_days(year, member, days, ADW_FIELDS)
+               + wrong_days(year, member, table_calendar(table))
+               for year, member, (result, days, table) in outputs)
+
+
+def bench_docx_python_docx(documents):
+    from docx import Document
+
+    import hghk
+
+    outputs = []
+    for year, member, docx_path, pdf_path in documents:
+        tables = Document(str(docx_path)).tables
+        outputs.append((year, member, {month: hghk.extract_table_to_dataframe(table)
+                                       for month, table in zip(month_en, tables)}))
+    return outputs
+
+
+def bench_docx_stream(documents):
+    import hghk
+
+    return [(year, member, hghk.parse_document(member, docx_path)[1])
+            for year, member, docx_path, pdf_path in documents]
+
+
+def bench_docx_parallel(documents):
+    import hghk
+
+    target = {}
+    for year, member, docx_path, pdf_path in documents:
+        calendar = {month: {} for month in hghk.month_en}
+        target.setdefault(str(year), {})[f'member_{member}'] = {'calendar': calendar}
+    for year in {year for year, *_ in documents}:
+        sources = [(member, docx_path) for y, member, docx_path, pdf_path in documents if y == year]
+        hghk.load_parallel(sources, str(year), target)
+    return [(year, member, target[str(year)][f'member_{member}']['calendar'])
+            for year, member, docx_path, pdf_path in documents]
+
+
+def bench_pdf_descriptions(documents):
+    import todododood
+
+    outputs = []
+    for year, member, docx_path, pdf_path in documents:
+        pages = pdf_extract.extract_pdf(pdf_path, pdf_extract.page_range(6, 22, (pdf_extract.TEXT,)), cache=None)
+        outputs.append((year, member, todododood.parse_pdf_to_json(pdf_path, pages)))
+    return outputs
+
+
+def bench_pdf_calendar(documents):
+    import adw
+
+    layout = pdf_extract.page_range(11, 22, (pdf_extract.RECTS, pdf_extract.CELLS))
+    outputs = []
+    for year, member, docx_path, pdf_path in documents:
+        pages = adw.parse_calendar(pdf_path, 11, 22, pdf_extract.extract_pdf(pdf_path, layout, cache=None))['calendar']
+        outputs.append((year, member, {month: pages.get(f'page_{n}', {}) for month, n in month_pages().items()}))
+    return outputs
+
+
+def bench_pdf_tables_template(documents):
+    import app
+
+    with tempfile.TemporaryDirectory() as directory:
+        template_path = f'{directory}/template.json'
+        return [(year, member, table_calendar(app.parse_calendar(pdf_path, template_path=template_path)))
+                for year, member, docx_path, pdf_path in documents]
+
+
+def bench_pdf_single_pass(documents):
+    import pdf_pipeline
+
+    return [(year, member, pdf_pipeline.parse_document(pdf_path))
+            for year, member, docx_path, pdf_path in documents]
+
+
+def bench_pdf_single_pass_parallel(documents):
+    import os
+
+    import pdf_pipeline
+
+    # at least two workers, so the process pool runs on one CPU too
+    workers = max(2, os.cpu_count() or 1)
+    return [(year, member, pdf_pipeline.parse_document(pdf_path, workers=workers))
+            for year, member, docx_path, pdf_path in documents]
+
+
+def bench_pdf_single_pass_parallel_cached(documents):
+    """
+    pdf_single_pass_parallel reading the pages from warm_cache: the check
+    run fills it, every timed run finds all pages cached.
+    """
+    default_cache = pdf_extract.default_cache
+    pdf_extract.default_cache = warm_cache
+    try:
+        return bench_pdf_single_pass_parallel(documents)
+    finally:
+        pdf_extract.default_cache = default_cache
+
+
+BENCHMARKS = {
+    'docx_python_docx': bench_docx_python_docx,
+    'docx_stream': bench_docx_stream,
+    'docx_parallel': bench_docx_parallel,
+    'pdf_descriptions': bench_pdf_descriptions,
+    'pdf_calendar': bench_pdf_calendar,
+    'pdf_tables_template': bench_pdf_tables_template,
+    'pdf_single_pass': bench_pdf_single_pass,
+    'pdf_single_pass_parallel': bench_pdf_single_pass_parallel,
+    'pdf_single_pass_parallel_cached': bench_pdf_single_pass_parallel_cached,
+}
+
+# output of every benchmark -> number of wrong days (or texts)
+CHECKS = {
+    'docx_python_docx': check_days,
+    'docx_stream': check_days,
+    'docx_parallel': check_days,
+    'pdf_descriptions': check_descriptions,
+    'pdf_calendar': check_adw,
+    'pdf_tables_template': check_template,
+    'pdf_single_pass': check_single_pass,
+    'pdf_single_pass_parallel': check_single_pass,
+    'pdf_single_pass_parallel_cached': check_single_pass,
+}
+
+
+def check(name, documents):
+    """
+    Runs one benchmark untimed and counts the wrong results of its output.
+    The *_cached benchmarks run twice, the second run reads the cache the
+    first one filled, and both outputs are checked.
+    """
+    wrong = 0
+    for _ in range(2 if name.endswith('_cached') else 1):
+        with contextlib.redirect_stdout(io.StringIO()):
+            outputs = BENCHMARKS[name](documents)
+        wrong += CHECKS[name](outputs)
+    return wrong
+
+
+def measure(func, *args):
+    """Wall time and CPU time (this process) of one call."""
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func(*args)
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    return {'wall': wall, 'cpu': cpu}
+
+
+def measure_memory(func, *args):
+    """tracemalloc peak of one call, run separately since tracing slows it down."""
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def run(documents, names, repeat, memory=True):
+    results = {}
+    for name in names:
+        wrong = check(name, documents)
+        runs = [measure(BENCHMARKS[name], documents) for _ in range(repeat)]
+        results[name] = {
+            'wrong': wrong,
+            'wall': min(r['wall'] for r in runs),
+            'cpu': min(r['cpu'] for r in runs),
+            'peak_bytes': measure_memory(BENCHMARKS[name], documents) if memory else None,
+            'runs': runs,
+        }
+    return results
+
+
+def print_table(results, documents):
+    print(f'{len(documents)} documents')
+    print(f'{"benchmark":<32}{"wrong":>7}{"wall, s":>10}{"cpu, s":>10}{"per doc, s":>12}{"peak, MB":>10}')
+    for name, result in results.items():
+        peak = f'{result["peak_bytes"] / 2 ** 20:>10.1f}' if result['peak_bytes'] is not None else f'{"-":>10}'
+        print(f'{name:<32}{result["wrong"]:>7}{result["wall"]:>10.3f}{result["cpu"]:>10.3f}'
+              f'{result["wall"] / len(documents):>12.3f}{peak}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks on synthetic documents')
+    parser.add_argument('--members', type=int, default=9)
+    parser.add_argument('--years', type=int, nargs='+', default=[2025])
+    parser.add_argument('--extra-pages', type=int, default=0)
+    parser.add_argument('--bold', action='store_true', help='faux-bold (doubled) glyphs in the PDFs')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc runs')
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--out', help='write the results as JSON')
+    args = parser.parse_args(argv)
+
+    global warm_cache
+    pdf_extract.default_cache = None
+    with tempfile.TemporaryDirectory() as directory:
+        warm_cache = pdf_extract.PageCache(Path(directory) / 'cache')
+        documents = synthetic.generate(directory, args.members, args.years, args.extra_pages, args.bold)
+        results = run(documents, args.only, args.repeat, not args.no_memory)
+
+    print_table(results, documents)
+    if args.out:
+        report = {'params': vars(args), 'documents': len(documents), 'results': results}
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+"""
+Manifest-driven batch builder for the year databases.
+
+    python build.py sources.json
+    python build.py --scan "C:\\Users\\Admin\\Downloads"
+
+The manifest is a JSON list of sources, any number of years and members:
+
+    [{"year": 2025, "member": 1, "docx": "Год 1 S (2025 КС).docx", "pdf": "..."}, ...]
+
+The days come from "docx" (hghk.py) and the optional "pdf" gives the
+descriptions (todododood.py). Parsed personal days are checked against
+personal_days.py and disagreeing ones are reported, but the parsed
+values are kept. A member without "docx" gets its personal days from
+personal_days.py (the year needs fitted shifts) and keeps the colors of
+its current subtree. --scan builds the manifest from the "Год N S (<year> ...)"
+file names in a directory instead.
+
+Every member subtree starts from the member's current data in
+db/y<year>.json, when there is any, and is written to db/y<year>.json as
+soon as it is finished, so only a few member subtrees are in memory at
+any time, however many years are built. The output has the same layout
+as json.dump(..., indent=4) and replaces the old file atomically; its
+long texts are interned into the shared db/strings.json (string_table.py).
+After each year its calendar store (calendar_store.py) and site shards
+(export_shards.py) are rebuilt.
+"""
+import argparse
+import json
+import os
+import re
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from pathlib import Path
+
+import calendar_store
+import export_shards
+import string_table
+from common import DB_DIR, month_en, publish
+
+
+DESCRIPTION_KEYS = ['personal_year', 'personal_day_descriptions', 'day_by_color', 'to_do', 'not_to_do']
+
+
+def load_manifest(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def scan(directory):
+    """Manifest from the "Год N S (<year> ...).docx/.pdf" files of a directory."""
+    sources = {}
+    for path in sorted(Path(directory).iterdir()):
+        match = re.match(r'Год\s*(\d+)\s*S\s*\((\d{4})', path.name)
+        if not match or path.suffix.lower() not in ('.docx', '.pdf'):
+            continue
+        member, year = int(match.group(1)), int(match.group(2))
+        entry = sources.setdefault((year, member), {'year': year, 'member': member})
+        entry[path.suffix.lower()[1:]] = str(path)
+    return [sources[key] for key in sorted(sources)]
+
+
+def empty_member(year):
+    tree = {'year': int(year)}
+    for key in DESCRIPTION_KEYS:
+        tree[key] = {}
+    tree['calendar'] = {month: {} for month in month_en}
+    return tree
+
+
+def load_base(year, current=None):
+    """Plain copy of the member's current subtree (a string_table view), or an empty one."""
+    if current is None:
+        return empty_member(year)
+    return string_table.resolve(current, current.strings)
+
+
+def report_mismatches(year, member, months):
+    """Prints the parsed personal days that differ from personal_days.py, if the year has shifts."""
+    import personal_days
+
+    if int(year) not in personal_days.SHIFTS:
+        return
+    computed = personal_days.calendar(year, member)
+    mismatches = [
+        f'{month} {day}: {value["personal_day"]} (computed {computed[month][day]["personal_day"]})'
+        for month, days in months.items() for day, value in days.items()
+        if day in computed[month] and value['personal_day'] != computed[month][day]['personal_day']
+    ]
+    if mismatches:
+        more = ' ...' if len(mismatches) > 5 else ''
+        print(f'{year} member_{member}: {len(mismatches)} parsed personal days differ from the computed ones '
+              f'and are kept: {", ".join(mismatches[:5])}{more}')
+
+
+def build_member(entry, base=None):
+    """
+    Builds one member subtree on top of base (its current plain subtree,
+    see load_base); runs in a worker process.
+    """
+    import hghk
+    import personal_days
+    import todododood
+
+    year, member = entry['year'], entry['member']
+    tree = base if base is not None else empty_member(year)
+    if entry.get('pdf'):
+        description = todododood.parse_pdf_to_json(entry['pdf'], year=int(year))
+        for key in DESCRIPTION_KEYS:
+            tree[key] = description[key]
+        for month, value in description['calendar'].items():
+            tree['calendar'].setdefault(month, {}).update(value)
+    if entry.get('docx'):
+        n, months = hghk.parse_document(member, entry['docx'])
+        report_mismatches(year, member, months)
+        # parsed values are kept, the computed days only check them
+        for month, days in months.items():
+            tree['calendar'].setdefault(month, {}).update(days)
+        return year, member, tree
+
+    # no document: computed days (ValueError for a year without shifts)
+    # with the colors the member already has
+    computed = personal_days.calendar(year, member)
+    for month, days in computed.items():
+        for day, value in days.items():
+            value['day_by_color'] = tree['calendar'].get(month, {}).get(day, {}).get('day_by_color')
+    for month, days in computed.items():
+        tree['calendar'].setdefault(month, {}).update(days)
+    return year, member, tree
+
+
+class YearWriter:
+    """
+    Writes {"<year>": {"member_N": {...}, ...}} one member at a time,
+    formatted like json.dump(indent=4), into a temp file that replaces
+    the target on close(). Long strings are written as references and
+    merged into the string table on close().
+    """
+
+    def __init__(self, path, year):
+        self.path = Path(path)
+        fd, self.tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+        self.file = os.fdopen(fd, 'w', encoding='utf-8')
+        self.file.write('{\n    ' + json.dumps(str(year)) + ': {')
+        self.empty = True
+        self.strings = {}
+
+    def add(self, key, tree):
+        tree = string_table.intern(tree, self.strings)
+        data = json.dumps(tree, ensure_ascii=False, indent=4).replace('\n', '\n        ')
+        self.file.write(('' if self.empty else ',') + '\n        ' + json.dumps(key) + ': ' + data)
+        self.empty = False
+
+    def close(self):
+        self.file.write('}\n}' if self.empty else '\n    }\n}')
+        self.file.close()
+        publish(self.tmp_path, self.path)
+        string_table.save_table(string_table.table_path(self.path), self.strings)
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.tmp_path)
+
+
+def iter_built(entries, workers=None, current=None):
+    """
+    Yields built member subtrees in manifest order. At most `workers`
+    members are in flight, so finished subtrees do not pile up.
+    current is {member number: subtree view} of the existing year, the
+    base of each rebuilt member.
+    """
+    current = current or {}
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for entry in entries:
+            base = load_base(entry['year'], current.get(int(entry['member'])))
+            pending.append(pool.submit(build_member, entry, base))
+            if len(pending) >= workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def existing_members(path: Path, year):
+    """
+    {member number: lazy subtree} of an existing y<year>.json. The raw
+    .node of a subtree still holds its string references, which stay
+    valid since the string table is only ever merged into.
+    """
+    if not path.exists():
+        return {}
+    members = string_table.load(path).get(str(year), {})
+    return {int(key.split('_')[1]): members[key] for key in members}
+
+
+def build(manifest, db_dir: Path = DB_DIR, workers=None):
+    """
+    Members of the manifest are rebuilt; the other members of an existing
+    y<year>.json are carried over unchanged.
+    """
+    entries = sorted(manifest, key=lambda entry: (int(entry['year']), int(entry['member'])))
+    for year, year_entries in groupby(entries, key=lambda entry: int(entry['year'])):
+        path = db_dir / f'y{year}.json'
+        kept = existing_members(path, year)
+        writer = YearWriter(path, year)
+        try:
+            for year_, member, tree in iter_built(year_entries, workers, kept):
+                for old in sorted(n for n in kept if n < member):
+                    writer.add(f'member_{old}', kept.pop(old).node)
+                kept.pop(member, None)
+                writer.add(f'member_{member}', tree)
+                print(year, member)
+            for old in sorted(kept):
+                writer.add(f'member_{old}', kept.pop(old).node)
+        except BaseException:
+            writer.abort()
+            raise
+        writer.close()
+        calendar_store.save_store(year, string_table.load(path)[str(year)], db_dir)
+        # the site reads the shards, refresh them with the year
+        export_shards.update_year(year, string_table.load_plain(path)[str(year)], db_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Builds db/y<year>.json from a manifest of sources')
+    parser.add_argument('manifest', nargs='?', help='JSON list of {year, member, docx, pdf}')
+    parser.add_argument('--scan', help='build the manifest from the file names in this directory')
+    parser.add_argument('--db-dir', type=Path, default=DB_DIR)
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args(argv)
+
+    if args.scan:
+        manifest = scan(args.scan)
+    elif args.manifest:
+        manifest = load_manifest(args.manifest)
+    else:
+        parser.error('a manifest or --scan is required')
+    build(manifest, args.db_dir, args.workers)
+
+
+if __name__ == '__main__':
+    main()
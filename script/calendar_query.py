@@ -0,0 +1,137 @@
+"""
+Query layer over the calendar database.
+
+The index is the (2, members, 366) array of calendar_store.py, read
+from db/y<year>.npy (calendar_store.load_store), which is rebuilt when
+db/y<year>.json changes.
+
+Examples:
+    python calendar_query.py days --member 4 --color red --quarter 3
+    python calendar_query.py next --color green --after 2025-06-12
+    python calendar_query.py count --personal-day 8
+"""
+import argparse
+import datetime
+from pathlib import Path
+
+import numpy as np
+
+import colors
+from calendar_store import COLOR, PERSONAL_DAY, day_of_year, load_store
+from common import DB_DIR, month_en
+
+
+def load_index(year, db_dir: Path = DB_DIR):
+    return load_store(year, db_dir)
+
+
+class CalendarQuery:
+
+    def __init__(self, year, store=None):
+        self.year = int(year)
+        self.store = load_index(year) if store is None else store
+        start = datetime.date(self.year, 1, 1)
+        length = (datetime.date(self.year + 1, 1, 1) - start).days
+        self.dates = [start + datetime.timedelta(days=i) for i in range(length)]
+        self.months = np.array([date.month for date in self.dates])
+
+    def _check_year(self, date):
+        if date.year != self.year:
+            raise ValueError(f'{date.isoformat()} is not in {self.year}')
+
+    def _mask(self, member=None, color=None, personal_day=None, start=None, end=None):
+        for date in (start, end):
+            if date is not None:
+                self._check_year(date)
+        store = self.store[:, :, :len(self.dates)]
+        mask = store[PERSONAL_DAY] > 0
+        if color is not None:
+            mask &= store[COLOR] == colors.COLORS.index(color) + 1
+        if personal_day is not None:
+            mask &= store[PERSONAL_DAY] == personal_day
+        if start is not None:
+            mask[:, :day_of_year(start)] = False
+        if end is not None:
+            mask[:, day_of_year(end) + 1:] = False
+        if member is not None:
+            only = np.zeros(mask.shape[0], dtype=bool)
+            only[member - 1] = True
+            mask[~only] = False
+        return mask
+
+    def days(self, **filters):
+        """(member, date, personal_day, color) for every matching day."""
+        rows, cols = np.nonzero(self._mask(**filters))
+        return [
+            (int(row) + 1, self.dates[col], int(self.store[PERSONAL_DAY, row, col]),
+             colors.code_name(int(self.store[COLOR, row, col])))
+            for row, col in zip(rows, cols)
+        ]
+
+    def next_day(self, after: datetime.date, **filters):
+        """
+        {member: first matching date after `after`} for every member; None
+        when `after` is at or past the end of the year, the whole year is
+        searched when it is before it.
+        """
+        if after >= self.dates[-1]:
+            return {member + 1: None for member in range(self.store.shape[1])}
+        start = after + datetime.timedelta(days=1) if after >= self.dates[0] else None
+        # a start filter (--quarter) narrows the search further
+        if filters.get('start') is not None:
+            start = max(start, filters['start']) if start is not None else filters['start']
+        filters['start'] = start
+        mask = self._mask(**filters)
+        found = mask.any(axis=1)
+        first = mask.argmax(axis=1)
+        return {
+            member + 1: self.dates[first[member]] if found[member] else None
+            for member in range(mask.shape[0])
+        }
+
+    def count_by_month(self, **filters):
+        """{month: number of matching days} summed over the selected members."""
+        per_day = self._mask(**filters).sum(axis=0)
+        counts = np.bincount(self.months - 1, weights=per_day, minlength=12)
+        return {month_en[i]: int(counts[i]) for i in range(12)}
+
+
+def quarter_bounds(year, quarter):
+    start = datetime.date(year, 3 * quarter - 2, 1)
+    end = datetime.date(year + (quarter == 4), 3 * quarter % 12 + 1, 1) - datetime.timedelta(days=1)
+    return start, end
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Queries over db/y<year>.json')
+    parser.add_argument('command', choices=['days', 'next', 'count'])
+    parser.add_argument('--year', type=int, default=2025)
+    parser.add_argument('--member', type=int)
+    parser.add_argument('--color', choices=colors.COLORS)
+    parser.add_argument('--personal-day', type=int)
+    parser.add_argument('--quarter', type=int, choices=[1, 2, 3, 4])
+    parser.add_argument('--after', type=datetime.date.fromisoformat,
+                        help='default: today, or the start of --year when today is in another year')
+    args = parser.parse_args(argv)
+
+    query = CalendarQuery(args.year)
+    filters = {'member': args.member, 'color': args.color, 'personal_day': args.personal_day}
+    if args.quarter:
+        filters['start'], filters['end'] = quarter_bounds(args.year, args.quarter)
+
+    if args.command == 'days':
+        for member, date, personal_day, color in query.days(**filters):
+            print(f'member_{member}', date.isoformat(), personal_day, color or '')
+    elif args.command == 'next':
+        after = args.after or datetime.date.today()
+        if args.after is None and after.year != args.year:
+            after = datetime.date(args.year, 1, 1) - datetime.timedelta(days=1)
+        for member, date in query.next_day(after, **filters).items():
+            print(f'member_{member}', date.isoformat() if date else '-')
+    else:
+        for month, count in query.count_by_month(**filters).items():
+            print(month, count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Compact array-backed calendar store.
+
+Built from db/y<year>.json and saved as db/y<year>.npy: one uint8 array
+of shape (2, members, 366) where
+
+    [0, member - 1, day of year] = personal_day (0 = no data)
+    [1, member - 1, day of year] = color code from colors.py (0 = no color)
+
+The file is memory-mapped on load, so answering (year, member, date)
+does not parse any JSON. db/y<year>.store.json keeps the sha256 of the
+y<year>.json the array was built from; load_store() rebuilds a store
+whose JSON has changed since. hghk.py and build.py rebuild it whenever
+they write y<year>.json; `python calendar_store.py` rebuilds all of them.
+"""
+import datetime
+import json
+from pathlib import Path
+
+import numpy as np
+
+import colors
+import string_table
+from common import DB_DIR, file_hash, month_en, write_json_atomic, year_db_paths
+
+
+DAYS = 366
+PERSONAL_DAY = 0
+COLOR = 1
+
+
+def day_of_year(date: datetime.date):
+    return date.timetuple().tm_yday - 1
+
+
+def build_store(members: dict, year):
+    """Builds the (2, members, 366) array from one year of the JSON database."""
+    numbers = [int(key.split('_')[1]) for key in members]
+    store = np.zeros((2, max(numbers, default=0), DAYS), dtype=np.uint8)
+    color_codes = {name: i + 1 for i, name in enumerate(colors.COLORS)}
+    for key, tree in members.items():
+        row = int(key.split('_')[1]) - 1
+        for month, days in tree.get('calendar', {}).items():
+            if month not in month_en:
+                continue
+            for day, value in days.items():
+                if not day.isdigit():
+                    continue
+                try:
+                    date = datetime.date(int(year), month_en.index(month) + 1, int(day))
+                except ValueError:
+                    # the DOCX templates carry e.g. april 31, there is no such date
+                    continue
+                store[PERSONAL_DAY, row, day_of_year(date)] = value['personal_day'] or 0
+                store[COLOR, row, day_of_year(date)] = color_codes.get(value['day_by_color'], colors.NONE)
+    return store
+
+
+class CalendarStore:
+    """Read access to db/y<year>.npy by (member, date)."""
+
+    def __init__(self, year, db_dir: Path = DB_DIR):
+        self.year = int(year)
+        self.data = load_store(year, db_dir)
+
+    @property
+    def members(self):
+        return self.data.shape[1]
+
+    def _cell(self, plane, member, date: datetime.date):
+        if date.year != self.year:
+            raise ValueError(f'{date.isoformat()} is not in {self.year}')
+        if not 1 <= member <= self.members:
+            raise ValueError(f'member {member} is not in 1..{self.members}')
+        return int(self.data[plane, member - 1, day_of_year(date)])
+
+    def personal_day(self, member, date: datetime.date):
+        return self._cell(PERSONAL_DAY, member, date) or None
+
+    def color(self, member, date: datetime.date):
+        return colors.code_name(self._cell(COLOR, member, date))
+
+    def day(self, member, date: datetime.date):
+        """Same dict as calendar[month][day] in the JSON database, or None."""
+        personal_day = self.personal_day(member, date)
+        if personal_day is None:
+            return None
+        return {
+            'day': date.day,
+            'personal_day': personal_day,
+            'day_by_color': self.color(member, date),
+        }
+
+
+_stores = {}
+
+
+def get(year, member, date: datetime.date, db_dir: Path = DB_DIR):
+    """Day dict for (year, member, date); stores are opened once per year."""
+    year = int(year)
+    if year not in _stores:
+        _stores[year] = CalendarStore(year, db_dir)
+    return _stores[year].day(member, date)
+
+
+def _paths(year, db_dir):
+    return db_dir / f'y{year}.json', db_dir / f'y{year}.npy', db_dir / f'y{year}.store.json'
+
+
+def save_store(year, members, db_dir: Path = DB_DIR):
+    """Writes y<year>.npy from members, stamped with the hash of the y<year>.json next to it."""
+    source, path, stamp = _paths(year, db_dir)
+    np.save(path, build_store(members, year))
+    write_json_atomic(stamp, {'source_hash': file_hash(source) if source.exists() else None})
+    _stores.pop(int(year), None)
+
+
+def load_store(year, db_dir: Path = DB_DIR):
+    """
+    Memory-mapped y<year>.npy; rebuilt first when it is missing or
+    y<year>.json has changed since it was saved.
+    """
+    source, path, stamp = _paths(year, db_dir)
+    saved = None
+    if path.exists() and stamp.exists():
+        with open(stamp, 'r', encoding='utf-8') as f:
+            saved = json.load(f).get('source_hash')
+    if not path.exists() or (source.exists() and saved != file_hash(source)):
+        save_store(year, string_table.load(source)[str(year)], db_dir)
+    return np.load(path, mmap_mode='r')
+
+
+def build_all(db_dir: Path = DB_DIR):
+    for source in year_db_paths(db_dir):
+        db = string_table.load(source)
+        for year, members in db.items():
+            save_store(year, members, db_dir)
+            print(year, len(members))
+
+
+if __name__ == '__main__':
+    build_all()
@@ -0,0 +1,129 @@
+"""
+Shared day color classifier.
+
+Every source (DOCX shading, pdfplumber fills, camelot) goes through the
+same reference colors and tolerance, so a cell gets the same color name
+whichever document it came from.
+
+Matching is done with per-channel lookup tables: for every channel value
+0–255 the table holds a bitmask of the colors that channel is within
+TOLERANCE of. A color matches when the three masks share a bit, so one
+lookup is three table reads and works the same on NumPy arrays.
+"""
+import numpy as np
+
+
+# Reference colors, taken from the DOCX shading (F59A00, 50A5A0, FA0701)
+COLOR_RANGES = {
+    'orange': (245, 154, 0),
+    'green': (80, 165, 160),
+    'red': (250, 7, 1),
+}
+TOLERANCE = 25
+
+COLORS = tuple(COLOR_RANGES)
+NONE = 0  # code of "no color"; color i has code i + 1
+
+
+def _build_tables(tolerance):
+    values = np.arange(256)
+    tables = np.zeros((3, 256), dtype=np.uint8)
+    for bit, rgb in enumerate(COLOR_RANGES.values()):
+        for channel, target in enumerate(rgb):
+            tables[channel][np.abs(values - target) <= tolerance] |= 1 << bit
+    # lowest set bit of the mask -> color code
+    codes = np.zeros(256, dtype=np.uint8)
+    for mask in range(1, 256):
+        codes[mask] = (mask & -mask).bit_length()
+    return tables, codes
+
+
+CHANNEL_TABLES, MASK_CODES = _build_tables(TOLERANCE)
+
+
+def to_rgb(value):
+    """
+    Converts a fill to an (R, G, B) tuple of 0–255 ints.
+    Accepts hex strings ('F59A00', '#f59a00'), 0–1 float tuples from
+    pdfplumber (gray, RGB or CMYK) and 0–255 int tuples.
+    Returns None for empty fills, 'auto' and anything unknown.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.lstrip('#')
+        if len(value) != 6:
+            return None
+        try:
+            return tuple(int(value[i:i + 2], 16) for i in (0, 2, 4))
+        except ValueError:
+            return None
+    if isinstance(value, (int, float)):
+        value = (value,)
+    value = tuple(value)
+    if all(isinstance(v, int) for v in value) and any(v > 1 for v in value):
+        return value if len(value) == 3 else None
+    if len(value) == 1:
+        g = round(value[0] * 255)
+        return g, g, g
+    if len(value) == 3:
+        return tuple(round(v * 255) for v in value)
+    if len(value) == 4:
+        c, m, y, k = value
+        return (
+            round(255 * (1 - c) * (1 - k)),
+            round(255 * (1 - m) * (1 - k)),
+            round(255 * (1 - y) * (1 - k)),
+        )
+    return None
+
+
+def classify_array(rgb):
+    """
+    Classifies an (N, 3) array of RGB fills in one call.
+    Float arrays are taken as 0–1, integer arrays as 0–255.
+    Returns a uint8 array of color codes (NONE or index in COLORS + 1).
+    """
+    rgb = np.asarray(rgb)
+    if rgb.dtype.kind == 'f':
+        rgb = np.rint(rgb * 255)
+    rgb = np.clip(rgb, 0, 255).astype(np.intp)
+    mask = (CHANNEL_TABLES[0][rgb[:, 0]]
+            & CHANNEL_TABLES[1][rgb[:, 1]]
+            & CHANNEL_TABLES[2][rgb[:, 2]])
+    return MASK_CODES[mask]
+
+
+def classify_code(value):
+    """Color code of a single fill in any format accepted by to_rgb."""
+    rgb = to_rgb(value)
+    if rgb is None:
+        return NONE
+    r, g, b = (min(max(int(c), 0), 255) for c in rgb)
+    mask = CHANNEL_TABLES[0][r] & CHANNEL_TABLES[1][g] & CHANNEL_TABLES[2][b]
+    return int(MASK_CODES[mask])
+
+
+def code_name(code):
+    """'orange' / 'green' / 'red' for a color code, None for NONE."""
+    return COLORS[code - 1] if code else None
+
+
+def classify(value):
+    """Color name of a single fill in any format accepted by to_rgb, or None."""
+    return code_name(classify_code(value))
+
+
+def classify_many(values):
+    """
+    Color names for a sequence of fills in mixed formats.
+    The fills are converted once and classified as one array.
+    """
+    rgb = [to_rgb(v) for v in values]
+    known = [i for i, v in enumerate(rgb) if v is not None]
+    names = [None] * len(rgb)
+    if known:
+        codes = classify_array(np.array([rgb[i] for i in known]))
+        for i, code in zip(known, codes):
+            names[i] = code_name(int(code))
+    return names
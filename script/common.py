@@ -0,0 +1,62 @@
+"""
+Names and helpers shared by the scripts: the db/ directory, month keys,
+content hashes, atomic JSON writes and the process RSS.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+
+
+DB_DIR = Path(__file__).resolve().parent.parent / 'db'
+
+month_en = ['january', 'february', 'march', 'april', 'may', 'june', 'july', 'august', 'september', 'october', 'november', 'december']
+month_ru = ['январь', 'февраль', 'март', 'апрель', 'май', 'июнь', 'июль', 'август', 'сентябрь', 'октябрь', 'ноябрь', 'декабрь']
+
+
+def year_db_paths(db_dir: Path = DB_DIR):
+    """db/y<year>.json files; y2025.sources.json and the like are left out."""
+    return [path for path in sorted(Path(db_dir).glob('y*.json')) if re.fullmatch(r'y\d{4}\.json', path.name)]
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def publish(tmp_path, path):
+    """Moves a finished temp file over path, readable like a normally written file."""
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+def write_json_atomic(path, data, **kwargs):
+    """Writes to a temp file next to path and renames it over path."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, **kwargs)
+        publish(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def current_rss():
+    """Resident memory of this process in bytes, or None if unknown."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
@@ -0,0 +1,132 @@
+"""
+Streaming reader for the tables of a .docx file.
+
+Walks word/document.xml in a single iterparse pass and yields
+(table index, row, col, text, fill) for every cell of the top level
+tables, without building the python-docx Document model. Like
+python-docx `document.tables`, only tables directly in w:body count;
+tables in text boxes or content controls are skipped.
+"""
+import zipfile
+
+try:
+    from lxml.etree import iterparse
+except ImportError:
+    from xml.etree.ElementTree import iterparse
+
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+BODY = W + 'body'
+TBL = W + 'tbl'
+TR = W + 'tr'
+TC = W + 'tc'
+P = W + 'p'
+T = W + 't'
+TAB = W + 'tab'
+BR = W + 'br'
+CR = W + 'cr'
+SHD = W + 'shd'
+TC_PR = W + 'tcPr'
+GRID_SPAN = W + 'gridSpan'
+VAL = W + 'val'
+FILL = W + 'fill'
+
+
+def iter_table_cells(path):
+    """
+    Yields (table index, row, col, text, fill) tuples.
+    col is the grid column of the cell (gridSpan is taken into account),
+    text matches python-docx `cell.text`, fill is the w:shd fill or None.
+    """
+    with zipfile.ZipFile(path) as archive:
+        with archive.open('word/document.xml') as xml:
+            yield from _iter_cells(xml)
+
+
+def _iter_cells(xml):
+    table = -1
+    depth = 0
+    in_body_table = False
+    parents = []
+    row = col = -1
+    in_tc_pr = False
+    span = 1
+    fill = None
+    paragraphs = []
+    runs = []
+
+    for event, elem in iterparse(xml, events=('start', 'end')):
+        tag = elem.tag
+        if event == 'start':
+            parent = parents[-1] if parents else None
+            parents.append(tag)
+            if tag == TBL:
+                depth += 1
+                if depth == 1:
+                    in_body_table = parent == BODY
+                    if in_body_table:
+                        table += 1
+                        row = -1
+            elif depth != 1 or not in_body_table:
+                continue
+            elif tag == TR:
+                row += 1
+                col = 0
+            elif tag == TC:
+                span = 1
+                fill = None
+                paragraphs = []
+            elif tag == TC_PR:
+                in_tc_pr = True
+            elif tag == P:
+                runs = []
+            continue
+
+        parents.pop()
+        if tag == TBL:
+            depth -= 1
+            if depth == 0:
+                elem.clear()
+            continue
+        if depth != 1 or not in_body_table:
+            if depth == 0 and tag == P:
+                elem.clear()
+            continue
+
+        if tag == T:
+            runs.append(elem.text or '')
+        elif tag == TAB:
+            runs.append('\t')
+        elif tag in (BR, CR):
+            runs.append('\n')
+        elif tag == P:
+            paragraphs.append(''.join(runs))
+        elif in_tc_pr and tag == SHD:
+            fill = elem.get(FILL)
+        elif in_tc_pr and tag == GRID_SPAN:
+            span = int(elem.get(VAL, 1))
+        elif tag == TC_PR:
+            in_tc_pr = False
+        elif tag == TC:
+            yield table, row, col, '\n'.join(paragraphs), fill
+            col += span
+            elem.clear()
+
+
+def iter_tables(path):
+    """
+    Groups the cells by table.
+    Yields (table index, [(row, col, text, fill), ...]).
+    """
+    current = None
+    cells = []
+    for table, row, col, text, fill in iter_table_cells(path):
+        if table != current:
+            if current is not None:
+                yield current, cells
+            current = table
+            cells = []
+        cells.append((row, col, text, fill))
+    if current is not None:
+        yield current, cells
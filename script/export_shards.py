@@ -0,0 +1,90 @@
+"""
+Export stage after hghk.py and build.py, which run it for every year
+they write (update_year); `python export_shards.py` re-exports all years.
+
+Splits every db/y<year>.json into compact shards for the static site:
+
+    db/<year>/member_N.json            whole member tree
+    db/<year>/member_N/<month>.json    one month of the calendar
+    db/manifest.json                   years -> members -> shard paths
+
+Each shard is written without indentation and gets precompressed
+.gz and .br (when the brotli package is installed) siblings.
+"""
+import gzip
+import json
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+import string_table
+from common import DB_DIR, year_db_paths
+
+
+
+def dump_compact(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def write_shard(path: Path, obj):
+    """Writes path with its .gz/.br siblings, returns the raw size in bytes."""
+    data = dump_compact(obj)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    # mtime=0 keeps the .gz output identical between runs
+    path.with_name(path.name + '.gz').write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        path.with_name(path.name + '.br').write_bytes(brotli.compress(data, quality=11))
+    return len(data)
+
+
+def export_year(year, members: dict, db_dir: Path = DB_DIR):
+    """Writes the shards of one year and returns its manifest entry."""
+    entry = {}
+    for member, tree in members.items():
+        member_file = f'{year}/{member}.json'
+        months = {}
+        for month, days in tree.get('calendar', {}).items():
+            month_file = f'{year}/{member}/{month}.json'
+            write_shard(db_dir / month_file, days)
+            months[month] = month_file
+        entry[member] = {
+            'file': member_file,
+            'bytes': write_shard(db_dir / member_file, tree),
+            'months': months,
+        }
+    return entry
+
+
+def load_manifest(db_dir: Path = DB_DIR):
+    path = db_dir / 'manifest.json'
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def update_year(year, members: dict, db_dir: Path = DB_DIR):
+    """Exports one year (plain member trees) and replaces its entry in db/manifest.json."""
+    manifest = load_manifest(db_dir)
+    manifest[str(year)] = export_year(str(year), members, db_dir)
+    write_shard(db_dir / 'manifest.json', dict(sorted(manifest.items())))
+    return manifest
+
+
+def export_all(db_dir: Path = DB_DIR):
+    manifest = {}
+    for source in year_db_paths(db_dir):
+        db = string_table.load_plain(source)
+        for year, members in db.items():
+            manifest[year] = export_year(year, members, db_dir)
+            print(year, len(members))
+    write_shard(db_dir / 'manifest.json', manifest)
+    return manifest
+
+
+if __name__ == '__main__':
+    export_all()
@@ -1,11 +1,18 @@
 import json
+import os
 
 from docx import Document
 from docx.oxml.ns import qn
 import re
 
+import calendar_store
+import colors
+import export_shards
+import instrument
+from common import DB_DIR, file_hash, month_en, write_json_atomic
+import string_table
+from docx_stream import iter_tables
 
-month_en = ['january', 'february', 'march', 'april', 'may', 'june', 'july', 'august', 'september', 'october', 'november', 'december']
 
 def get_cell_fill_color(cell):
     """
@@ -19,6 +26,25 @@ def get_cell_fill_color(cell):
         return fill_color
     return None
 
+def parse_day_cell(text, bg):
+    """
+    Parses a "day\npersonal_day ЛИЧНЫЙ ДЕНЬ" cell.
+    Returns the day dict or None if the cell is not a day cell.
+    """
+    if 'ЛИЧНЫЙ ДЕНЬ'.lower() not in text.lower():
+        return None
+    text = text.replace('\t', ' ')
+    texts = text.split(' ')[0]
+
+    days = texts.split('\n')
+    day = int(days[0])
+    personal_day = int(days[1])
+    return {
+        'day': day,
+        'personal_day': personal_day,
+        'day_by_color': colors.classify(bg)
+    }
+
 def extract_table_to_dataframe(table):
     days_dict = {
         
@@ -26,26 +52,22 @@ def extract_table_to_dataframe(table):
     for i in range(1, table.rows.__len__()):
         for cell in table.rows[i].cells:
             if 'ЛИЧНЫЙ ДЕНЬ'.lower() in cell.text.lower():
-                text = cell.text.replace('\t', ' ')
-                texts = text.split(' ')[0]
-
-                days = texts.split('\n')
-                day = int(days[0])
-                personal_day = int(days[1])
-                bg = get_cell_fill_color(cell)
-                if bg == 'F59A00':
-                    color = 'orange'
-                elif bg == '50A5A0':
-                    color = 'green'
-                elif bg == 'FA0701':
-                    color = 'red'
-                else:
-                    color = None
-                days_dict[str(day)] = {
-                    'day': day,
-                    'personal_day': personal_day,
-                    'day_by_color': color
-                }
+                day = parse_day_cell(cell.text, get_cell_fill_color(cell))
+                days_dict[str(day['day'])] = day
+    return days_dict
+
+def extract_cells_to_days(cells):
+    """
+    Same as extract_table_to_dataframe, but for the
+    (row, col, text, fill) tuples of docx_stream.iter_tables.
+    """
+    days_dict = {}
+    for row, col, text, fill in cells:
+        if row < 1:
+            continue
+        day = parse_day_cell(text, fill)
+        if day is not None:
+            days_dict[str(day['day'])] = day
     return days_dict
 
 def loop_month(tables, n,year,target_dict:dict):
@@ -56,26 +78,112 @@ def loop_month(tables, n,year,target_dict:dict):
         for day in days:
             target_dict[year][f'member_{n}']['calendar'][month_en[i]][day] = days[day]
         i += 1
-        
 
-with open('../db/y2025.json', 'r', encoding='utf-8') as f:
-    
-    target = json.load(f)
-    for i in range(1,6):
-        document = Document(r"C:\Users\Admin\Downloads\Год {} S (2025 КС).docx".format(i))
-        tables = document.tables
-        print(len(tables))
-        loop_month(tables, i, '2025', target)
-    for i in range(6,10):   
-        document = Document(r"C:\Users\Admin\Downloads\Год {} S (2025 СК).docx".format(i))
-        tables = document.tables
+
+DOCX_PATH = r"C:\Users\Admin\Downloads\Год {} S (2025 {}).docx"
+
+
+def member_sources():
+    """
+    Returns (member, path) pairs for every source document of the year.
+    """
+    sources = []
+    for i in range(1, 6):
+        sources.append((i, DOCX_PATH.format(i, 'КС')))
+    for i in range(6, 10):
+        sources.append((i, DOCX_PATH.format(i, 'СК')))
+    return sources
+
+
+def parse_document(n, path):
+    """
+    Parses one document in a worker process.
+    Returns the member number and its days grouped by month.
+    """
+    months = {}
+    with instrument.stage('docx_stream', path):
+        for i, cells in iter_tables(path):
+            if i >= len(month_en):
+                break
+            print(n, i)
+            months[month_en[i]] = extract_cells_to_days(cells)
+    return n, months
+
+
+def merge_member(target_dict: dict, year, n, months):
+    for month, days in months.items():
+        for day in days:
+            target_dict[year][f'member_{n}']['calendar'][month][day] = days[day]
+
+
+def load_parallel(sources, year, target_dict: dict, workers=None):
+    """
+    Parses the documents in a process pool, one worker per document,
+    and merges the per-member results into target_dict at the end.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    if not sources:
+        return
+    with ProcessPoolExecutor(max_workers=workers or len(sources)) as pool:
+        futures = [pool.submit(parse_document, n, path) for n, path in sources]
+        results = [future.result() for future in futures]
+    for n, months in results:
+        merge_member(target_dict, year, n, months)
+
+
+def load_serial(sources, year, target_dict: dict):
+    for n, path in sources:
+        with instrument.stage('docx_open', path):
+            document = Document(path)
+            tables = document.tables
         print(len(tables))
-        loop_month(tables, i, '2025', target)
-    # for i in range(1, 10):
-    #     target['2025'][f'member_{i}']['member'] = i
-    with open('../db/y2025.json', 'w', encoding='utf-8') as ff:
-        json.dump(target, ff, ensure_ascii=False, indent=4)
-        
-        
+        with instrument.stage('docx_cell_walk', path):
+            loop_month(tables, n, year, target_dict)
 
 
+DB_PATH = DB_DIR / 'y2025.json'
+SOURCES_PATH = DB_DIR / 'y2025.sources.json'
+
+
+def changed_sources(sources, manifest: dict):
+    """
+    Returns the sources whose content hash differs from the manifest
+    and the new {member_N: hash} manifest.
+    """
+    hashes = {}
+    changed = []
+    for n, path in sources:
+        hashes[f'member_{n}'] = file_hash(path)
+        if manifest.get(f'member_{n}') != hashes[f'member_{n}']:
+            changed.append((n, path))
+    return changed, hashes
+
+
+if __name__ == '__main__':
+    import sys
+
+    with instrument.stage('json_load', DB_PATH):
+        target = string_table.load_plain(DB_PATH)
+
+    sources = member_sources()
+    manifest = {}
+    if '--full' not in sys.argv and os.path.exists(SOURCES_PATH):
+        with open(SOURCES_PATH, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    sources, hashes = changed_sources(sources, manifest)
+    print('changed:', [n for n, path in sources])
+    if not sources:
+        sys.exit(0)
+
+    if '--serial' in sys.argv:
+        load_serial(sources, '2025', target)
+    else:
+        load_parallel(sources, '2025', target)
+    # for i in range(1, 10):
+    #     target['2025'][f'member_{i}']['member'] = i
+    with instrument.stage('json_dump', DB_PATH):
+        string_table.dump(DB_PATH, target, indent=4)
+    calendar_store.save_store('2025', target['2025'])
+    export_shards.update_year('2025', target['2025'])
+    write_json_atomic(SOURCES_PATH, hashes, indent=4)
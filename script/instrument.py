@@ -0,0 +1,188 @@
+"""
+Opt-in per-stage timing and memory instrumentation.
+
+Off by default; every stage() is then a no-op. Turn it on with
+
+    CALENDAR_PROFILE=report.json python hghk.py
+
+or instrument.enable() from code. Each stage records wall time, CPU time
+and the change of the process RSS together with the document and page it
+ran for. The tracemalloc peak of each stage is recorded only on request,
+
+    CALENDAR_PROFILE=report.json CALENDAR_PROFILE_MEMORY=1 python hghk.py
+
+since tracing every allocation slows the code down several times and
+the times of such a run are not representative. At exit the records are written to the JSON report and a short summary
+(totals per stage, slowest documents and pages) is printed.
+
+Stages that run inside worker processes (hghk.load_parallel) are not
+collected; use the serial mode to profile them.
+"""
+import atexit
+import contextlib
+import json
+import os
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+
+from common import current_rss
+
+
+ENV = 'CALENDAR_PROFILE'
+MEMORY_ENV = 'CALENDAR_PROFILE_MEMORY'
+
+records = []
+_stack = []
+_enabled = False
+_memory = False
+_report_path = None
+_owner_pid = None
+
+
+class _Stage:
+
+    def __init__(self, name, document, page):
+        self.name = name
+        self.document = document
+        self.page = page
+        self.peak = 0
+
+    def __enter__(self):
+        if _memory:
+            if _stack:
+                _stack[-1].peak = max(_stack[-1].peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        _stack.append(self)
+        self.rss = current_rss()
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        rss = current_rss()
+        peak = None
+        if _memory:
+            peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+        _stack.pop()
+        if _stack and peak is not None:
+            _stack[-1].peak = max(_stack[-1].peak, peak)
+        records.append({
+            'stage': self.name,
+            'document': self.document,
+            'page': self.page,
+            'depth': len(_stack),
+            'wall': wall,
+            'cpu': cpu,
+            'rss_delta_bytes': rss - self.rss if rss is not None and self.rss is not None else None,
+            'peak_bytes': peak,
+        })
+        return False
+
+
+def enabled():
+    return _enabled
+
+
+def enable(report_path=None, memory=False):
+    """
+    Starts recording; report_path gets the JSON report at exit. memory=True
+    also traces allocations for the per-stage tracemalloc peak.
+    """
+    global _enabled, _memory, _report_path, _owner_pid
+    _owner_pid = os.getpid()
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if not _enabled:
+        atexit.register(_at_exit)
+    _enabled = True
+    _report_path = report_path
+
+
+def stage(name, document=None, page=None):
+    """Context manager around one stage; does nothing unless enabled."""
+    if not _enabled:
+        return contextlib.nullcontext()
+    if document is not None:
+        document = Path(str(document)).name
+    return _Stage(name, document, page)
+
+
+def report():
+    return {'records': records, 'totals': totals()}
+
+
+def totals():
+    """
+    {stage: {'count', 'wall', 'cpu', 'rss_delta_bytes', 'peak_bytes'}} summed
+    over all records (the largest peak); None for what was not measured.
+    """
+    result = defaultdict(lambda: {'count': 0, 'wall': 0.0, 'cpu': 0.0, 'rss_delta_bytes': None, 'peak_bytes': None})
+    for record in records:
+        total = result[record['stage']]
+        total['count'] += 1
+        total['wall'] += record['wall']
+        total['cpu'] += record['cpu']
+        if record['rss_delta_bytes'] is not None:
+            total['rss_delta_bytes'] = (total['rss_delta_bytes'] or 0) + record['rss_delta_bytes']
+        if record['peak_bytes'] is not None:
+            total['peak_bytes'] = max(total['peak_bytes'] or 0, record['peak_bytes'])
+    return dict(result)
+
+
+def write_report(path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report(), f, ensure_ascii=False, indent=2)
+
+
+def summary(top=5):
+    def megabytes(value):
+        return f'{"-":>10}' if value is None else f'{value / 2 ** 20:>10.1f}'
+
+    lines = [f'{"stage":<28}{"count":>7}{"wall, s":>10}{"cpu, s":>10}{"rss +MB":>10}{"peak, MB":>10}']
+    for name, total in sorted(totals().items(), key=lambda item: -item[1]['wall']):
+        lines.append(f'{name:<28}{total["count"]:>7}{total["wall"]:>10.3f}{total["cpu"]:>10.3f}'
+                     f'{megabytes(total["rss_delta_bytes"])}{megabytes(total["peak_bytes"])}')
+
+    # per document / page only the outermost stages count, nested ones are inside them
+    outer = {}
+    for record in records:
+        key = record['document'], record['page']
+        outer[key] = min(outer.get(key, record['depth']), record['depth'])
+    documents = defaultdict(float)
+    pages = defaultdict(float)
+    for record in records:
+        key = record['document'], record['page']
+        if record['document'] is None or record['depth'] != outer[key]:
+            continue
+        if record['page'] is None:
+            documents[record['document']] += record['wall']
+        else:
+            pages[key] += record['wall']
+
+    if documents:
+        lines.append('slowest documents:')
+        for document, wall in sorted(documents.items(), key=lambda item: -item[1])[:top]:
+            lines.append(f'  {wall:>8.3f}s  {document}')
+    if pages:
+        lines.append('slowest pages:')
+        for (document, page), wall in sorted(pages.items(), key=lambda item: -item[1])[:top]:
+            lines.append(f'  {wall:>8.3f}s  {document} p.{page}')
+    return '\n'.join(lines)
+
+
+def _at_exit():
+    # worker processes inherit the environment but must not overwrite the report
+    if not records or os.getpid() != _owner_pid:
+        return
+    if _report_path:
+        write_report(_report_path)
+    print(summary())
+
+
+if os.environ.get(ENV):
+    enable(os.environ[ENV], memory=bool(os.environ.get(MEMORY_ENV)))
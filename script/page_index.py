@@ -0,0 +1,200 @@
+"""
+Section index of a "Год N S" PDF.
+
+The parsers used to assume one fixed layout: 6–7 day descriptions,
+8 colors, 9 to do / not to do, 10 personal year, 11–22 months. Here each
+page is classified from its header only (the top band of the page, see
+pdf_extract.HEADER) and the result is a {section: [page numbers]} index:
+
+    {"personal_day_descriptions": [6, 7], "day_by_color": [8], "to_do": [9],
+     "personal_year": [10], "january": [11], ..., "december": [22]}
+
+Section names are the keys of the todododood.py JSON. A month page is
+matched by the month name in its header (ЯНВАРЬ, ФЕВРАЛЬ, ...); month
+pages that name no month, or several, are counted from the nearest page
+that names one (see assign_months). A section the headers do not reveal
+keeps its DEFAULT_INDEX pages, so a document with the usual layout parses
+as before.
+
+scan() classifies the pages inside the extraction pass of the parsers:
+every page is parsed once, its header picks the parts extracted from it
+(SectionParts), and the pages go through the page cache of pdf_extract
+with their headers. section_index() gives the index alone and caches it
+per PDF content hash in script/.cache/sections.
+
+    python page_index.py "Год 1 S (2025 КС).pdf"
+"""
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+
+import instrument
+import pdf_extract
+from common import file_hash, month_en, month_ru
+
+
+CACHE_DIR = Path(__file__).resolve().parent / '.cache' / 'sections'
+MAX_PAGES = 100
+
+DEFAULT_INDEX = {
+    'personal_day_descriptions': [6, 7],
+    'day_by_color': [8],
+    'to_do': [9],
+    'personal_year': [10],
+    **{month: [i + 11] for i, month in enumerate(month_en)},
+}
+
+MONTH_NAMES = [name.upper() for name in month_ru]
+MONTH_NAME_PATTERN = '|'.join(rf'\b{name}\b' for name in MONTH_NAMES)
+
+# checked in order, the first matching rule wins
+RULES = [
+    ('month', rf'Месяц|ПН\s+ВТ\s+СР|{MONTH_NAME_PATTERN}'),
+    ('personal_day_descriptions', r'ЭНЕРГИЯ'),
+    ('day_by_color', r'Красн\w*\s*[:\-–]|Оранж\w*\s*[:\-–]|Зел[её]н\w*\s*[:\-–]'),
+    ('to_do', r'(Понедельник|Вторник|Среда|Четверг|Пятница|Суббота|Воскресенье)\s*[:\-–]'),
+    ('personal_year', r'^\s*Год\s'),
+]
+
+
+def classify(header):
+    """Rule name for one page header, or None."""
+    for name, pattern in RULES:
+        if re.search(pattern, header, re.M):
+            return name
+    return None
+
+
+# section of every DEFAULT_INDEX page, months as 'month'
+DEFAULT_SECTIONS = {n: 'month' if section in month_en else section
+                    for section, pages in DEFAULT_INDEX.items() for n in pages}
+# section names of SectionParts
+SECTIONS = list(dict.fromkeys(DEFAULT_SECTIONS.values()))
+
+
+def named_months(header):
+    """Months (0-based) whose names the header contains."""
+    return [i for i, name in enumerate(MONTH_NAMES) if re.search(rf'\b{name}\b', header)]
+
+
+def assign_months(pages, headers):
+    """
+    {month: [page]} for the month pages (in page order). A page that names
+    exactly one month gets it. The others are counted from the nearest
+    such page before them (after them for the leading ones), or by their
+    position when no page names a single month; a counted month is kept
+    only if the page names no month or names that one too.
+    """
+    named = {}
+    for n in pages:
+        names = named_months(headers[n])
+        if len(names) == 1:
+            named[n] = names[0]
+    anchors = [i for i, n in enumerate(pages) if n in named]
+
+    index = {}
+    for i, n in enumerate(pages):
+        if n in named:
+            month = named[n]
+        else:
+            before = [j for j in anchors if j < i]
+            after = [j for j in anchors if j > i]
+            if before:
+                month = named[pages[before[-1]]] + i - before[-1]
+            elif after:
+                month = named[pages[after[0]]] - (after[0] - i)
+            else:
+                month = i
+            names = named_months(headers[n])
+            if not 0 <= month < len(month_en) or (names and month not in names):
+                continue
+        index.setdefault(month_en[month], [n])
+    return index
+
+
+def build_index(headers: dict):
+    """{section: [pages]} from {page_number: header text}."""
+    found = {}
+    for n in sorted(headers):
+        name = classify(headers[n])
+        if name:
+            found.setdefault(name, []).append(n)
+
+    index = assign_months(found.pop('month', []), headers)
+    first_month = min((pages[0] for pages in index.values()), default=None)
+    # cover pages may start with "Год" too: the personal year is the last
+    # such page before the months
+    years = [n for n in found.pop('personal_year', []) if first_month is None or n < first_month]
+    if years:
+        index['personal_year'] = years[-1:]
+    index.update(found)
+    return {section: index.get(section, pages) for section, pages in DEFAULT_INDEX.items()}
+
+
+class SectionParts:
+    """
+    pdf_extract layout value: the parts to extract from a page, picked
+    from its header. parts maps a section name ('month' for the month
+    pages) to its parts; a page no rule matches gets the parts of its
+    DEFAULT_INDEX section, in case the index falls back to it.
+    """
+
+    def __init__(self, parts: dict):
+        self.parts = parts
+        # page cache key of the pages extracted through this selector
+        self.key = json.dumps([RULES, DEFAULT_SECTIONS, sorted((section, sorted(p)) for section, p in parts.items())],
+                              ensure_ascii=False)
+
+    def __call__(self, page_number, header):
+        section = classify(header) or DEFAULT_SECTIONS.get(page_number)
+        return self.parts.get(section, ())
+
+
+def scan(pdf_path, parts=None, cache=True, workers=None):
+    """
+    One extraction pass over the first MAX_PAGES pages: each page is
+    parsed once, classified by its header and extracted with the parts of
+    its section (SectionParts(parts)). Returns the section index and
+    {page_number: content}; every content has its HEADER.
+    """
+    layout = {n: SectionParts(parts or {}) for n in range(1, MAX_PAGES + 1)}
+    with instrument.stage('page_index', pdf_path):
+        pages = pdf_extract.extract_pdf(pdf_path, layout, cache=cache, workers=workers)
+        index = build_index({n: content[pdf_extract.HEADER] for n, content in pages.items()})
+    return index, pages
+
+
+def _cache_path(pdf_hash):
+    settings = json.dumps([RULES, MAX_PAGES, pdf_extract.HEADER_BAND, pdf_extract.HEADER_LINES])
+    key = hashlib.sha256(f'{pdf_hash}:{settings}'.encode('utf-8')).hexdigest()
+    return CACHE_DIR / f'{key}.json'
+
+
+def section_index(pdf_path, cache=True):
+    """
+    Section index of pdf_path, from the cache when the document was scanned
+    before. cache=False skips both this cache and the page cache.
+    """
+    path = _cache_path(file_hash(pdf_path)) if cache else None
+    if path is not None and path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    index, pages = scan(pdf_path, cache=True if cache else None)
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+    return index
+
+
+def layout(index, sections, parts):
+    """pdf_extract layout with parts for the pages of the given sections."""
+    return {n: parts for section in sections for n in index.get(section, [])}
+
+
+if __name__ == '__main__':
+    for pdf_path in sys.argv[1:]:
+        print(pdf_path, json.dumps(section_index(pdf_path), ensure_ascii=False))
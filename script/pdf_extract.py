@@ -0,0 +1,323 @@
+"""
+Single-pass PDF extraction shared by the parsers.
+
+Opens a "Год N S" PDF once and collects, page by page, everything the
+parsers need: text for the descriptions (todododood.py), words, rects
+and tables for the calendar and colors (adw.py, app.py). The result is
+a {page_number: content} dict of plain Python objects.
+
+Extracted pages are kept in an on-disk cache (script/.cache/pages) keyed
+on the PDF content hash, the page number and the extraction settings,
+so re-running the parsers after a regex change does not redo the layout
+analysis. The cache is bounded by size; least recently used entries are
+evicted first.
+
+With workers > 1 (or CALENDAR_PAGE_WORKERS set) the pages missing from the
+cache are extracted in a process pool, each worker with its own handle
+on the PDF, and still come out in page order.
+"""
+import gc
+import gzip
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pdfplumber
+
+import instrument
+from common import current_rss, file_hash
+
+
+TEXT = 'text'
+WORDS = 'words'
+RECTS = 'rects'
+TABLES = 'tables'
+# cells of the first table with their boxes: [{'bbox': [x0, top, x1, bottom], 'text': ...}]
+CELLS = 'cells'
+# top lines of the page only, for page_index.py
+HEADER = 'header'
+# A layout value may also be a callable select(page_number, header) -> parts
+# (page_index.SectionParts): the page is then extracted with its HEADER
+# plus the parts picked from it, and cached under select.key.
+
+DESCRIPTION_PAGES = range(6, 11)
+CALENDAR_PAGES = range(11, 23)
+
+# page number -> what to extract from it
+LAYOUT = {
+    **{n: (TEXT,) for n in DESCRIPTION_PAGES},
+    **{n: (TEXT, WORDS, RECTS, TABLES, CELLS) for n in CALENDAR_PAGES},
+}
+
+WORD_OPTIONS = {'x_tolerance': 3, 'y_tolerance': 3}
+# Faux-bold text in the source PDFs draws every glyph twice with a small
+# offset ("ГГоодд ввыыббоорраа"). Chars with the same text, font and size
+# closer than this (in points) are dropped before any text is assembled.
+DEDUPE_TOLERANCE = 1
+RECT_KEYS = ('x0', 'x1', 'top', 'bottom', 'fill', 'non_stroking_color')
+# HEADER: text of the top band of the page (fraction of its height), first lines
+HEADER_BAND = 0.35
+HEADER_LINES = 8
+
+CACHE_DIR = Path(__file__).resolve().parent / '.cache' / 'pages'
+CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+# Memory ceiling of the page-at-a-time mode, see iter_pages
+MAX_RSS = int(os.environ.get('CALENDAR_MAX_RSS_MB', 0)) * 1024 * 1024 or None
+# RSS rarely drops after a reopen; the next one waits until it has grown this much
+REOPEN_GROWTH = 32 * 1024 * 1024
+
+# Worker processes of the parallel mode, see iter_pages
+PAGE_WORKERS = int(os.environ.get('CALENDAR_PAGE_WORKERS', 0)) or None
+
+
+class PageCache:
+    """
+    Extracted page content on disk, one gzip-compressed JSON file per
+    (PDF hash, page, settings). Reads touch the file, and evict() drops
+    the least recently used files once the cache exceeds max_bytes.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def settings(parts):
+        return json.dumps({
+            'parts': parts.key if callable(parts) else sorted(parts),
+            'words': WORD_OPTIONS,
+            'dedupe': DEDUPE_TOLERANCE,
+            'rects': RECT_KEYS,
+            'header': [HEADER_BAND, HEADER_LINES],
+            'pdfplumber': pdfplumber.__version__,
+        }, sort_keys=True)
+
+    def _path(self, pdf_hash, page_number, parts):
+        key = f'{pdf_hash}:{page_number}:{self.settings(parts)}'
+        return self.directory / (hashlib.sha256(key.encode('utf-8')).hexdigest() + '.json.gz')
+
+    def get(self, pdf_hash, page_number, parts):
+        path = self._path(pdf_hash, page_number, parts)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                content = json.load(f)
+        except (OSError, ValueError):
+            return None
+        os.utime(path)
+        return content
+
+    def put(self, pdf_hash, page_number, parts, content):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(pdf_hash, page_number, parts)
+        tmp_path = path.with_suffix('.tmp')
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(content, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        entries = []
+        total = 0
+        for path in self.directory.glob('*.json.gz'):
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+default_cache = PageCache()
+
+
+def extract_page(page, parts, document=None):
+    """
+    Extracts the requested parts of one pdfplumber page.
+    All parts are computed from the same parsed page, so its layout
+    analysis is done once. parts may be a select callable, see HEADER.
+    """
+    n = page.page_number
+    content = {'page_number': n}
+    with instrument.stage('parse_page', document, n):
+        # pdfplumber parses the page on the first access to its objects;
+        # done here so that cost is not booked to the first stage below
+        page.chars
+    select = parts if callable(parts) else None
+    if select is not None or HEADER in parts:
+        with instrument.stage('header', document, n):
+            # only the chars of the band go through dedupe and text layout
+            band = page.crop((0, 0, page.width, page.height * HEADER_BAND))
+            if DEDUPE_TOLERANCE:
+                band = band.dedupe_chars(tolerance=DEDUPE_TOLERANCE)
+            content[HEADER] = '\n'.join((band.extract_text() or '').splitlines()[:HEADER_LINES])
+    if select is not None:
+        parts = select(n, content[HEADER])
+    if not set(parts) - {HEADER}:
+        return content
+    if DEDUPE_TOLERANCE:
+        with instrument.stage('dedupe_chars', document, n):
+            # one pass over the whole char table of the page
+            page = page.dedupe_chars(tolerance=DEDUPE_TOLERANCE)
+    if TEXT in parts:
+        with instrument.stage('extract_text', document, n):
+            content[TEXT] = page.extract_text() or ''
+    if WORDS in parts:
+        with instrument.stage('extract_words', document, n):
+            content[WORDS] = page.extract_words(**WORD_OPTIONS)
+    if RECTS in parts:
+        with instrument.stage('rects', document, n):
+            content[RECTS] = [{key: rect.get(key) for key in RECT_KEYS} for rect in page.rects]
+    if TABLES in parts or CELLS in parts:
+        with instrument.stage('extract_tables', document, n):
+            # one table detection for both parts
+            tables = page.find_tables()
+            texts = [table.extract() for table in tables]
+        if TABLES in parts:
+            content[TABLES] = texts
+        if CELLS in parts:
+            content[CELLS] = table_cells(tables[0], texts[0]) if tables else []
+    return content
+
+
+def table_cells(table, texts):
+    """Cells of a pdfplumber table with their boxes, merged cells left out."""
+    cells = []
+    for row, row_texts in zip(table.rows, texts):
+        for bbox, text in zip(row.cells, row_texts):
+            if bbox is not None:
+                cells.append({'bbox': list(bbox), 'text': text or ''})
+    return cells
+
+
+_worker_pdf = None
+
+
+def _open_in_worker(pdf_path):
+    global _worker_pdf
+    _worker_pdf = pdfplumber.open(pdf_path)
+
+
+def _extract_in_worker(n, parts, pdf_path):
+    """Page content from the handle of this worker, None past the end."""
+    if n > len(_worker_pdf.pages):
+        return None
+    page = _worker_pdf.pages[n - 1]
+    content = extract_page(page, parts, pdf_path)
+    page.close()
+    return content
+
+
+def _iter_parallel(pdf_path, numbers, layout, workers):
+    """Contents of the given pages in order, extracted by a process pool."""
+    with ProcessPoolExecutor(max_workers=workers, initializer=_open_in_worker, initargs=(str(pdf_path),)) as pool:
+        results = pool.map(_extract_in_worker, numbers, [layout[n] for n in numbers],
+                           [str(pdf_path)] * len(numbers))
+        for n, content in zip(numbers, results):
+            yield n, content
+
+
+def iter_pages(pdf_path, layout=None, cache=True, max_rss=MAX_RSS, workers=PAGE_WORKERS):
+    """
+    Yields (page_number, content) for the pages of layout ({page_number:
+    parts}, LAYOUT by default), one page at a time.
+    Pages found in cache are not extracted again; the PDF is opened only
+    when a page is missing. cache=True uses default_cache, cache=None
+    disables the cache. Pages past the end of the document are left out.
+
+    Each pdfplumber page is closed (its parsed objects released) right
+    after extraction. When the process RSS goes over max_rss bytes the
+    PDF handle itself is dropped and reopened for the next page, which
+    also frees pdfminer's document-level caches, so peak memory does not
+    grow with the length of the document. The allocator seldom returns
+    that memory to the OS, so after a reopen the next one happens only
+    once RSS has grown by REOPEN_GROWTH more.
+
+    workers > 1 fans the pages missing from the cache out to that many
+    processes; each opens the PDF once and extracts its pages
+    independently. Results are gathered back in page order. max_rss does
+    not apply to the workers, and their instrument stages are not
+    collected.
+    """
+    layout = LAYOUT if layout is None else layout
+    if cache is True:
+        cache = default_cache
+    with instrument.stage('page_cache', pdf_path):
+        pdf_hash = file_hash(pdf_path) if cache is not None else None
+
+    if workers and workers > 1:
+        yield from _iter_pages_parallel(pdf_path, layout, cache, pdf_hash, workers)
+        return
+
+    pdf = None
+    reopen_rss = None  # RSS right after the last reopen
+    try:
+        for n in sorted(layout):
+            content = cache.get(pdf_hash, n, layout[n]) if cache is not None else None
+            if content is None:
+                if pdf is None:
+                    with instrument.stage('pdf_open', pdf_path):
+                        pdf = pdfplumber.open(pdf_path)
+                if n > len(pdf.pages):
+                    break
+                page = pdf.pages[n - 1]
+                content = extract_page(page, layout[n], pdf_path)
+                page.close()
+                if cache is not None:
+                    cache.put(pdf_hash, n, layout[n], content)
+                rss = (current_rss() or 0) if max_rss else 0
+                if max_rss and rss > max_rss and (reopen_rss is None or rss - reopen_rss > REOPEN_GROWTH):
+                    pdf.close()
+                    pdf = None
+                    gc.collect()
+                    reopen_rss = current_rss() or 0
+            yield n, content
+    finally:
+        if pdf is not None:
+            pdf.close()
+        if cache is not None:
+            cache.evict()
+
+
+def _iter_pages_parallel(pdf_path, layout, cache, pdf_hash, workers):
+    cached = {}
+    if cache is not None:
+        for n in layout:
+            content = cache.get(pdf_hash, n, layout[n])
+            if content is not None:
+                cached[n] = content
+    missing = [n for n in sorted(layout) if n not in cached]
+    # no pool at all when every page comes from the cache
+    extracted = _iter_parallel(pdf_path, missing, layout, workers) if missing else None
+    try:
+        for n in sorted(layout):
+            if n in cached:
+                yield n, cached.pop(n)
+                continue
+            n, content = next(extracted)
+            if content is None:
+                break
+            if cache is not None:
+                cache.put(pdf_hash, n, layout[n], content)
+            yield n, content
+    finally:
+        if extracted is not None:
+            extracted.close()
+        if cache is not None:
+            cache.evict()
+
+
+def extract_pdf(pdf_path, layout=None, cache=True, max_rss=MAX_RSS, workers=PAGE_WORKERS):
+    """
+    Opens the PDF once and returns {page_number: content} for the pages
+    of layout, see iter_pages.
+    """
+    return dict(iter_pages(pdf_path, layout, cache, max_rss, workers))
+
+
+def page_range(start_page, end_page, parts):
+    """Layout with the same parts for every page of start_page..end_page."""
+    return {n: parts for n in range(start_page, end_page + 1)}
@@ -0,0 +1,54 @@
+"""
+Parses a "Год N S" PDF with a single extraction pass.
+
+The pages of each section come from page_index.py, so documents with a
+shifted layout parse too. page_index.scan opens the document once and
+classifies every page in the same pass that extracts it; the same page
+content is handed to the description parser (todododood.py), the
+calendar/color parser (adw.py) and the table parser (app.py).
+"""
+import json
+import sys
+from pathlib import Path
+
+import adw
+import app
+import page_index
+import pdf_extract
+import todododood
+from common import month_en
+
+
+# section -> parts, see page_index.SectionParts
+PARTS = {
+    **{section: (pdf_extract.TEXT,) for section in page_index.SECTIONS},
+    'month': pdf_extract.LAYOUT[pdf_extract.CALENDAR_PAGES[0]],
+}
+
+
+def parse_document(pdf_path, workers=pdf_extract.PAGE_WORKERS):
+    """
+    Returns the todododood.py JSON (descriptions only, as before), the
+    adw.py calendar days as {month: {day: day dict}} and the app.py
+    table DataFrame.
+    workers > 1 extracts the pages in a process pool (pdf_extract.iter_pages).
+    """
+    index, pages = page_index.scan(pdf_path, PARTS, workers=workers)
+    result = todododood.parse_pdf_to_json(pdf_path, pages, index=index)
+    month_pages = [n for month in month_en for n in index[month]]
+    calendar = adw.parse_calendar(pdf_path, min(month_pages), max(month_pages), pages)['calendar']
+    days = {month: calendar.get(f'page_{index[month][0]}', {}) for month in month_en}
+    return result, days, app.parse_calendar_pages(pages, app.member_from_path(pdf_path))
+
+
+def main(paths):
+    for path in map(Path, paths):
+        result, days, tables = parse_document(path)
+        out_path = todododood.OUTPUT_DIR / todododood.get_json_name(path.name)
+        with open(out_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(path.name, sum(map(len, days.values())), len(tables), out_path)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or [todododood.INPUT_PDF.format(i) for i in range(6, 10)])
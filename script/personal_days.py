@@ -0,0 +1,182 @@
+"""
+Arithmetic personal_day calendar.
+
+The personal day is a digit reduction of the member's personal year, the
+month and the day:
+
+    personal_day = reduce(personal_year + month + day + shift[month])
+
+e.g. member_1 (personal year 1), january 1 -> reduce(1 + 1 + 1) = 3.
+shift is a per-month correction the documents of a year carry on top of
+the plain rule (0 for the plain rule). For 2025 it is fitted from
+db/y2025.json, see SHIFTS and --fit. A month without data to fit has
+shift None and its days are left empty (0) rather than guessed; a year
+without fitted shifts is an error, unless the plain rule is asked for
+(shift=PLAIN, --plain).
+
+The whole year is computed at once with NumPy into the same
+(members, 366) layout as the PERSONAL_DAY plane of calendar_store.py,
+so a new year needs no table extraction for the personal days; the
+DOCX/PDF documents only give the texts and the colors.
+
+    python personal_days.py --verify 2025     # compare with db/y2025.json
+    python personal_days.py --fit 2025        # fit the month shifts
+    python personal_days.py --year 2026 --member 3 --plain
+"""
+import argparse
+import json
+from collections import Counter
+
+import numpy as np
+
+import calendar_store
+import string_table
+from common import DB_DIR, month_en
+
+
+DAYS = calendar_store.DAYS
+
+# fitted with `python personal_days.py --fit 2025`; november and december
+# have no days in db/y2025.json, so nothing is known about them
+SHIFTS = {
+    2025: (0, 0, 1, 1, 2, 2, 2, 2, 2, 2, None, None),
+}
+PLAIN = (0,) * 12
+
+
+def reduce_digits(n):
+    """Digit reduction to 1..9 (n > 0), element-wise for arrays."""
+    return (np.asarray(n) - 1) % 9 + 1
+
+
+def year_dates(year):
+    """(months, days) of every date of the year, 1-based, as int arrays."""
+    start = np.datetime64(f'{int(year)}-01-01')
+    dates = np.arange(start, np.datetime64(f'{int(year) + 1}-01-01'), dtype='datetime64[D]')
+    months = dates.astype('datetime64[M]')
+    return months.astype(int) % 12 + 1, (dates - months).astype(int) + 1
+
+
+def shift_for(year):
+    if int(year) not in SHIFTS:
+        raise ValueError(f'no month shifts for {year}: fit them with --fit {year} or pass shift=PLAIN')
+    return SHIFTS[int(year)]
+
+
+def personal_days(year, members=9, personal_years=None, shift=None):
+    """
+    (members, 366) uint8 array of personal days, day of year on the
+    second axis; 0 past the end of a non-leap year and in the months
+    whose shift is None. personal_years defaults to the member number
+    ("Год N").
+    """
+    if personal_years is None:
+        personal_years = np.arange(1, members + 1)
+    personal_years = np.asarray(personal_years, dtype=np.int64)
+    shift = list(shift_for(year) if shift is None else shift)
+    known = np.array([value is not None for value in shift])
+    shift = np.array([value or 0 for value in shift], dtype=np.int64)
+    months, days = year_dates(year)
+    result = np.zeros((len(personal_years), DAYS), dtype=np.uint8)
+    values = reduce_digits(personal_years[:, None] + (months + days + shift[months - 1])[None, :])
+    result[:, :len(days)] = np.where(known[months - 1], values, 0)
+    return result
+
+
+def calendar(year, member, shift=None):
+    """
+    {month: {day: day dict}} like hghk.parse_document, without colors;
+    months whose shift is None have no days.
+    """
+    row = personal_days(year, personal_years=[member], shift=shift)[0]
+    months, days = year_dates(year)
+    result = {month: {} for month in month_en}
+    for i, (month, day) in enumerate(zip(months.tolist(), days.tolist())):
+        if not row[i]:
+            continue
+        result[month_en[month - 1]][str(day)] = {'day': day, 'personal_day': int(row[i]), 'day_by_color': None}
+    return result
+
+
+def parsed_days(year, db_path=None):
+    """PERSONAL_DAY plane of the parsed database (0 = no data)."""
+    db_path = db_path or DB_DIR / f'y{year}.json'
+    members = string_table.load(db_path)[str(year)]
+    return calendar_store.build_store(members, year)[calendar_store.PERSONAL_DAY]
+
+
+def fit(year, parsed, personal_years=None):
+    """
+    Month shifts that agree with most parsed days of the members (rows of
+    parsed, personal years 1..N unless given); months without parsed days
+    get None.
+    """
+    months, days = year_dates(year)
+    plain = personal_days(year, parsed.shape[0], personal_years, shift=PLAIN)[:, :len(days)]
+    observed = parsed[:, :len(days)].astype(np.int64)
+    diff = (observed - plain) % 9
+    shift = []
+    for month in range(1, 13):
+        values = diff[:, months == month][observed[:, months == month] > 0]
+        shift.append(int(np.bincount(values, minlength=9).argmax()) if values.size else None)
+    return tuple(shift)
+
+
+def verify(year, parsed, shift=None):
+    """
+    [(member, month, day, parsed, computed), ...] for every disagreeing
+    parsed day. Without shift each member is computed with shifts fitted
+    to the other members only, so a member's own days (and parsing errors)
+    take no part in the rule they are checked against.
+    """
+    months, days = year_dates(year)
+    if shift is None:
+        members = np.arange(parsed.shape[0])
+        computed = np.concatenate([
+            personal_days(year, personal_years=[m + 1],
+                          shift=fit(year, parsed[members != m], members[members != m] + 1))
+            for m in members
+        ])
+    else:
+        computed = personal_days(year, parsed.shape[0], shift=shift)
+    # days the rule leaves empty (no shift for their month) are not compared
+    rows, cols = np.nonzero((parsed > 0) & (computed > 0) & (parsed != computed))
+    return [
+        (int(row) + 1, int(months[col]), int(days[col]), int(parsed[row, col]), int(computed[row, col]))
+        for row, col in zip(rows, cols)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Arithmetic personal_day calendar')
+    parser.add_argument('--year', type=int, default=2025)
+    parser.add_argument('--member', type=int)
+    parser.add_argument('--verify', type=int, metavar='YEAR', help='compare with db/y<YEAR>.json')
+    parser.add_argument('--fit', type=int, metavar='YEAR', help='fit the month shifts to db/y<YEAR>.json')
+    parser.add_argument('--db', help='database to compare with (default db/y<YEAR>.json)')
+    parser.add_argument('--plain', action='store_true', help='plain rule, no month shifts')
+    args = parser.parse_args(argv)
+    shift = PLAIN if args.plain else None
+
+    if args.fit:
+        print(fit(args.fit, parsed_days(args.fit, args.db)))
+    elif args.verify:
+        parsed = parsed_days(args.verify, args.db)
+        mismatches = verify(args.verify, parsed, shift)
+        print(f'parsed days: {int((parsed > 0).sum())}, mismatches: {len(mismatches)}')
+        if shift is None and SHIFTS.get(args.verify) != fit(args.verify, parsed):
+            print(f'SHIFTS[{args.verify}] differs from the fit: {fit(args.verify, parsed)}')
+        by_month = Counter((member, month) for member, month, *_ in mismatches)
+        for (member, month), count in sorted(by_month.items()):
+            print(f'  member_{member} {month_en[month - 1]}: {count}')
+        return 1 if mismatches else 0
+    elif args.member:
+        print(json.dumps(calendar(args.year, args.member, shift), ensure_ascii=False, indent=4))
+    else:
+        for member, row in enumerate(personal_days(args.year, shift=shift), start=1):
+            print(f'member_{member}', ''.join(map(str, row[row > 0].tolist())))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,141 @@
+"""
+Cross-checks the DOCX and PDF calendars.
+
+    python reconcile.py                        # db/y2025.json vs script/*calendar_*.json
+    python reconcile.py --db ../db/y2025.json calendar_1.json --out report.json
+
+Both sides are normalized to {(year, member, month, day): (personal_day,
+color)} with month as 1–12, whatever the month keys were (english names
+from hghk.py/todododood.py, russian names from calendar_1.json,
+page_11..page_22 from adw.py). The two dicts are then hash-joined and
+every disagreement in personal_day or color is reported, along with the
+days only one side has.
+"""
+import argparse
+import glob
+import json
+import re
+from collections import Counter
+from collections.abc import Mapping
+from pathlib import Path
+
+import string_table
+from common import DB_DIR, month_en, month_ru
+
+
+DB_PATH = DB_DIR / 'y2025.json'
+PDF_GLOB = str(Path(__file__).resolve().parent / '*calendar_*.json')
+
+MONTHS = {
+    **{name: i + 1 for i, name in enumerate(month_en)},
+    **{name: i + 1 for i, name in enumerate(month_ru)},
+    # adw.py: month pages 11–22
+    **{f'page_{i + 11}': i + 1 for i in range(12)},
+}
+
+
+def month_number(key):
+    key = str(key).strip().lower()
+    if key.isdigit() and 1 <= int(key) <= 12:
+        return int(key)
+    return MONTHS.get(key)
+
+
+def normalize_calendar(year, member, calendar: Mapping, into: dict):
+    # plain dicts from the PDF side, string_table views from the database
+    for month_key, days in calendar.items():
+        month = month_number(month_key)
+        if month is None or not isinstance(days, Mapping):
+            continue
+        for day, value in days.items():
+            if not str(day).isdigit() or not isinstance(value, Mapping):
+                continue
+            into[int(year), int(member), month, int(day)] = (value.get('personal_day'), value.get('day_by_color'))
+    return into
+
+
+def load_db(path):
+    """Keyed days of a y<year>.json database (DOCX side)."""
+    db = string_table.load(path)
+    keyed = {}
+    for year, members in db.items():
+        for member, tree in members.items():
+            normalize_calendar(year, member.split('_')[1], tree.get('calendar', {}), keyed)
+    return keyed
+
+
+def load_pdf_outputs(paths, default_year=2025):
+    """Keyed days of Ncalendar_N.json / calendar_N.json files (PDF side)."""
+    keyed = {}
+    for path in paths:
+        match = re.search(r'(\d+)\.json$', Path(path).name)
+        if not match:
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        normalize_calendar(data.get('year', default_year), match.group(1), data.get('calendar', {}), keyed)
+    return keyed
+
+
+def reconcile(docx: dict, pdf: dict):
+    """
+    Joins the two keyed dicts. Days that only one side has are counted,
+    not listed: the PDF outputs usually cover a part of the calendar.
+    """
+    mismatches = []
+    matched = 0
+    for key, (pdf_day, pdf_color) in pdf.items():
+        value = docx.get(key)
+        if value is None:
+            continue
+        matched += 1
+        docx_day, docx_color = value
+        fields = []
+        if pdf_day != docx_day:
+            fields.append('personal_day')
+        if pdf_color != docx_color:
+            fields.append('color')
+        if fields:
+            year, member, month, day = key
+            mismatches.append({
+                'year': year, 'member': member, 'month': month, 'day': day, 'fields': fields,
+                'docx': {'personal_day': docx_day, 'color': docx_color},
+                'pdf': {'personal_day': pdf_day, 'color': pdf_color},
+            })
+    return {
+        'matched': matched,
+        'only_docx': len(docx.keys() - pdf.keys()),
+        'only_pdf': len(pdf.keys() - docx.keys()),
+        'mismatches': mismatches,
+    }
+
+
+def summary(report):
+    fields = Counter(field for mismatch in report['mismatches'] for field in mismatch['fields'])
+    members = Counter(mismatch['member'] for mismatch in report['mismatches'])
+    lines = [
+        f"matched days: {report['matched']}, only DOCX: {report['only_docx']}, only PDF: {report['only_pdf']}",
+        f"mismatches: {len(report['mismatches'])} (personal_day: {fields['personal_day']}, color: {fields['color']})",
+    ]
+    for member, count in sorted(members.items()):
+        lines.append(f'  member_{member}: {count}')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Reconciles the DOCX and PDF calendars')
+    parser.add_argument('pdf', nargs='*', help='PDF-side JSON files (default: script/*calendar_*.json)')
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--out', help='write the full report as JSON')
+    args = parser.parse_args(argv)
+
+    report = reconcile(load_db(args.db), load_pdf_outputs(args.pdf or sorted(glob.glob(PDF_GLOB))))
+    print(summary(report))
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 1 if report['mismatches'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
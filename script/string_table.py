@@ -0,0 +1,206 @@
+"""
+Content-addressed string table for the year databases.
+
+The long texts of db/y<year>.json (personal_day_descriptions, day_by_color,
+to_do, not_to_do, personal_month_description, ...) are mostly identical
+between members and years. intern() replaces every string of at least
+MIN_LENGTH characters by a reference
+
+    {"$ref": "<first 16 hex digits of its sha1>"}
+
+and collects the texts in one table, db/strings.json, shared by all years.
+Since the ids depend only on the text, tables of different builds merge
+without conflicts; a text that is no longer referenced stays in the table
+until the table is rebuilt with --rebuild.
+
+load() gives a read-only view of a database in which the references are
+resolved only when a value is accessed; resolve() materializes a plain
+tree (for writing shards or editing). Databases without references load
+unchanged.
+
+    python string_table.py              # intern db/y*.json in place
+    python string_table.py --rebuild    # same, and drop unreferenced texts
+"""
+import argparse
+import hashlib
+import json
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+
+from common import DB_DIR, write_json_atomic, year_db_paths
+
+
+TABLE_NAME = 'strings.json'
+REF = '$ref'
+MIN_LENGTH = 32
+
+
+def string_id(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+def is_ref(node):
+    return isinstance(node, dict) and len(node) == 1 and REF in node
+
+
+def intern(node, strings: dict):
+    """Copy of node with long strings replaced by references collected in strings."""
+    if isinstance(node, str) and len(node) >= MIN_LENGTH:
+        key = string_id(node)
+        strings[key] = node
+        return {REF: key}
+    if isinstance(node, dict):
+        return {key: intern(value, strings) for key, value in node.items()}
+    if isinstance(node, list):
+        return [intern(value, strings) for value in node]
+    return node
+
+
+def resolve(node, strings: dict):
+    """Plain copy of node with every reference replaced by its text."""
+    if isinstance(node, (LazyDict, LazyList)):
+        node = node.node
+    if is_ref(node):
+        return strings[node[REF]]
+    if isinstance(node, dict):
+        return {key: resolve(value, strings) for key, value in node.items()}
+    if isinstance(node, list):
+        return [resolve(value, strings) for value in node]
+    return node
+
+
+def _lazy(node, strings):
+    if is_ref(node):
+        return strings[node[REF]]
+    if isinstance(node, dict):
+        return LazyDict(node, strings)
+    if isinstance(node, list):
+        return LazyList(node, strings)
+    return node
+
+
+class LazyDict(Mapping):
+    """Read-only dict view that resolves references on access."""
+
+    def __init__(self, node: dict, strings: dict):
+        self.node = node
+        self.strings = strings
+
+    def __getitem__(self, key):
+        return _lazy(self.node[key], self.strings)
+
+    def __iter__(self):
+        return iter(self.node)
+
+    def __len__(self):
+        return len(self.node)
+
+
+class LazyList(Sequence):
+
+    def __init__(self, node: list, strings: dict):
+        self.node = node
+        self.strings = strings
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [_lazy(value, self.strings) for value in self.node[index]]
+        return _lazy(self.node[index], self.strings)
+
+    def __len__(self):
+        return len(self.node)
+
+
+def table_path(db_path):
+    return Path(db_path).resolve().parent / TABLE_NAME
+
+
+def load_table(path):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class Table(Mapping):
+    """The string table file, read on the first lookup."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._strings = None
+
+    @property
+    def strings(self):
+        if self._strings is None:
+            self._strings = load_table(self.path)
+        return self._strings
+
+    def __getitem__(self, key):
+        return self.strings[key]
+
+    def __iter__(self):
+        return iter(self.strings)
+
+    def __len__(self):
+        return len(self.strings)
+
+
+def load(db_path, strings=None):
+    """
+    Lazy view of a y<year>.json. strings defaults to the db/strings.json
+    next to it, which is read only once a reference is resolved.
+    """
+    with open(db_path, 'r', encoding='utf-8') as f:
+        db = json.load(f)
+    if strings is None:
+        strings = Table(table_path(db_path))
+    return LazyDict(db, strings)
+
+
+def load_plain(db_path):
+    """Fully resolved y<year>.json as plain dicts."""
+    view = load(db_path)
+    return resolve(view, view.strings)
+
+
+def save_table(path, strings: dict, merge=True):
+    """Writes the table, merged with the texts already in it unless merge=False."""
+    if merge:
+        strings = {**load_table(path), **strings}
+    write_json_atomic(path, dict(sorted(strings.items())), indent=4)
+
+
+def dump(db_path, db, **kwargs):
+    """Interns db, writes it to db_path and merges its texts into the shared table."""
+    strings = {}
+    write_json_atomic(db_path, intern(db, strings), **kwargs)
+    save_table(table_path(db_path), strings)
+    return strings
+
+
+def intern_all(db_dir: Path = DB_DIR, rebuild=False):
+    sources = year_db_paths(db_dir)
+    table = db_dir / TABLE_NAME
+    old = load_table(table)
+    strings = {}
+    for source in sources:
+        before = source.stat().st_size
+        with open(source, 'r', encoding='utf-8') as f:
+            db = resolve(json.load(f), old)
+        write_json_atomic(source, intern(db, strings), indent=4)
+        print(f'{source.name}: {before} -> {source.stat().st_size} bytes')
+    save_table(table, strings, merge=not rebuild)
+    print(f'{TABLE_NAME}: {len(load_table(table))} strings, {table.stat().st_size} bytes')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Interns the long strings of db/y*.json into db/strings.json')
+    parser.add_argument('--db-dir', type=Path, default=DB_DIR)
+    parser.add_argument('--rebuild', action='store_true', help='drop the texts no database references')
+    args = parser.parse_args(argv)
+    intern_all(args.db_dir, args.rebuild)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""
+Synthetic "Год N S" documents for the benchmarks.
+
+Produces DOCX and PDF calendars laid out like the real ones: description
+pages 6–10 (day descriptions, colors, to do / not to do, personal year)
+and month pages 11–22 with a 7-column table whose day cells read
+"day\\npersonal_day ЛИЧНЫЙ ДЕНЬ" and are shaded orange/green/red.
+Documents can be scaled in members, years and extra pages.
+
+Needs python-docx and reportlab (plus a DejaVuSans.ttf for Cyrillic).
+"""
+import calendar
+import datetime
+import glob
+import random
+from pathlib import Path
+
+from common import month_en, month_ru
+
+
+WEEK = ['ПН', 'ВТ', 'СР', 'ЧТ', 'ПТ', 'СБ', 'ВС']
+WEEK_DAYS = ['Понедельник', 'Вторник', 'Среда', 'Четверг', 'Пятница', 'Суббота', 'Воскресенье']
+FILLS = {'orange': 'F59A00', 'green': '50A5A0', 'red': 'FA0701'}
+FONT = 'DejaVu'
+
+
+def reduce_digits(n):
+    while n > 9:
+        n = sum(map(int, str(n)))
+    return n
+
+
+def personal_day(member, date: datetime.date):
+    return reduce_digits(member + date.month + date.day)
+
+
+def day_color(member, date: datetime.date):
+    rnd = random.Random(member * 1000003 + date.toordinal())
+    return rnd.choice([None, None, None, 'orange', 'green', 'red'])
+
+
+def expected_calendar(year, member):
+    """{month: {day: day dict}} the generated documents contain."""
+    result = {}
+    for month in range(1, 13):
+        days = {}
+        for day in range(1, calendar.monthrange(year, month)[1] + 1):
+            date = datetime.date(year, month, day)
+            days[str(day)] = {
+                'day': day,
+                'personal_day': personal_day(member, date),
+                'day_by_color': day_color(member, date),
+            }
+        result[month_en[month - 1]] = days
+    return result
+
+
+def _weeks(year, month):
+    return calendar.Calendar(firstweekday=0).monthdayscalendar(year, month)
+
+
+def description_lines(year, member):
+    """Text of pages 6–10, one list of lines per page."""
+    return [
+        [f'{d} ЭНЕРГИЯ ДНЯ {d}: описание личного дня {d}' for d in range(1, 6)],
+        [f'{d} ЭНЕРГИЯ ДНЯ {d}: описание личного дня {d}' for d in range(6, 10)],
+        ['Красный: неблагоприятный день', 'Оранжевый: день успеха через анализ', 'Зелёный: день успеха и любви'],
+        [f'{name}: хорошо делать дела дня {i}' for i, name in enumerate(WEEK_DAYS)]
+        + [f'Не делать дела дня {i}' for i in range(7)],
+        [f'Год {member}. Синтетический год {year}', 'Описание личного года'],
+    ]
+
+
+def make_docx(path, year, member):
+    from docx import Document
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+
+    document = Document()
+    for lines in description_lines(year, member):
+        for line in lines:
+            document.add_paragraph(line)
+    for month in range(1, 13):
+        document.add_paragraph(f'Месяц {month}: описание месяца {month_en[month - 1]}')
+        weeks = _weeks(year, month)
+        table = document.add_table(rows=len(weeks) + 1, cols=7)
+        for col, name in enumerate(WEEK):
+            table.rows[0].cells[col].text = name
+        for r, week in enumerate(weeks, start=1):
+            cells = table.rows[r].cells
+            for col, day in enumerate(week):
+                if not day:
+                    continue
+                date = datetime.date(year, month, day)
+                cells[col].text = f'{day}\n{personal_day(member, date)} ЛИЧНЫЙ ДЕНЬ'
+                color = day_color(member, date)
+                if color:
+                    shd = OxmlElement('w:shd')
+                    shd.set(qn('w:val'), 'clear')
+                    shd.set(qn('w:fill'), FILLS[color])
+                    cells[col]._tc.get_or_add_tcPr().append(shd)
+    document.save(str(path))
+
+
+def _register_font():
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    if FONT not in pdfmetrics.getRegisteredFontNames():
+        path = glob.glob('/usr/share/fonts/**/DejaVuSans.ttf', recursive=True)[0]
+        pdfmetrics.registerFont(TTFont(FONT, path))
+
+
+def _draw_text(c, x, y, text, bold):
+    c.drawString(x, y, text)
+    if bold:
+        # faux bold: the same glyphs drawn again with a small offset
+        c.drawString(x + 0.3, y, text)
+
+
+def _text_page(c, lines, bold):
+    c.setFont(FONT, 10)
+    y = 800
+    for line in lines:
+        _draw_text(c, 40, y, line, bold)
+        y -= 16
+    c.showPage()
+
+
+def make_pdf(path, year, member, extra_pages=0, bold=False, cover_pages=5):
+    """
+    bold draws every glyph twice, like the faux-bold text of the real PDFs.
+    extra_pages appends filler pages after the months; cover_pages other
+    than 5 shifts the sections away from the usual page numbers.
+    """
+    from reportlab.pdfgen import canvas
+
+    _register_font()
+    c = canvas.Canvas(str(path))
+    for n in range(1, cover_pages + 1):
+        _text_page(c, [f'Страница {n}'], bold)
+    for lines in description_lines(year, member):
+        _text_page(c, lines, bold)
+
+    x0, top, w, h = 40, 760, 75, 60
+    for month in range(1, 13):
+        c.setFont(FONT, 10)
+        # the month name heads the page, as in the real PDFs (page_index.py)
+        _draw_text(c, 40, 815, month_ru[month - 1].upper(), bold)
+        _draw_text(c, 40, 800, f'Месяц {month}: описание месяца {month_en[month - 1]}', bold)
+        weeks = _weeks(year, month)
+        for col, name in enumerate(WEEK):
+            c.drawString(x0 + col * w + 5, top - 15, name)
+        for r, week in enumerate(weeks):
+            y = top - 20 - (r + 1) * h
+            for col, day in enumerate(week):
+                if not day:
+                    continue
+                x = x0 + col * w
+                date = datetime.date(year, month, day)
+                color = day_color(member, date)
+                if color:
+                    rgb = int(FILLS[color], 16)
+                    c.setFillColorRGB((rgb >> 16) / 255, (rgb >> 8 & 255) / 255, (rgb & 255) / 255)
+                    c.rect(x, y, w, h, stroke=0, fill=1)
+                    c.setFillColorRGB(0, 0, 0)
+                c.setFont(FONT, 7)
+                c.drawString(x + 5, y + h - 15, str(day))
+                c.drawString(x + 5, y + h - 30, f'{personal_day(member, date)} ЛИЧНЫЙ ДЕНЬ')
+        bottom = top - 20 - len(weeks) * h
+        for y in [top, top - 20] + [top - 20 - (r + 1) * h for r in range(len(weeks))]:
+            c.line(x0, y, x0 + 7 * w, y)
+        for col in range(8):
+            c.line(x0 + col * w, top, x0 + col * w, bottom)
+        c.showPage()
+
+    for n in range(extra_pages):
+        _text_page(c, [f'Дополнительная страница {n + 1}'] + ['Текст приложения'] * 40, bold)
+    c.save()
+
+
+def generate(directory, members=9, years=(2025,), extra_pages=0, bold=False, docx=True, pdf=True):
+    """
+    Writes "Год N S (<year>).docx/.pdf" for every member and year into
+    directory and returns [(year, member, docx_path, pdf_path), ...].
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    documents = []
+    for year in years:
+        for member in range(1, members + 1):
+            stem = directory / f'Год {member} S ({year})'
+            docx_path = stem.with_suffix('.docx') if docx else None
+            pdf_path = stem.with_suffix('.pdf') if pdf else None
+            if docx:
+                make_docx(docx_path, year, member)
+            if pdf:
+                make_pdf(pdf_path, year, member, extra_pages, bold)
+            documents.append((year, member, docx_path, pdf_path))
+    return documents
@@ -13,14 +13,17 @@
 }
 
 Зависимости:
-    pip install pdfplumber
+    pip install pdfplumber  (через pdf_extract.py)
 """
 
 import re
 import json
-import pdfplumber
 from pathlib import Path
 
+import instrument
+import page_index
+import pdf_extract
+
 # ========== Настройки ==========
 INPUT_PDF = r"C:\Users\Admin\Downloads\Год {} S (2025 СК1ё).pdf"
 OUTPUT_DIR = Path(".")
@@ -33,18 +36,40 @@ def get_json_name(pdf_name: str) -> str:
 
 
 # ========== Функции ==========
-def extract_page_text(pdf, page_num):
-    """Извлечь текст одной страницы"""
-    try:
-        return pdf.pages[page_num - 1].extract_text() or ""
-    except IndexError:
-        return ""
-
-
-def parse_pdf_to_json(pdf_path):
-    """Основная функция: извлекает данные по страницам и собирает JSON"""
+def extract_page_text(pages, page_num):
+    """Текст одной страницы из уже извлеченного содержимого (pdf_extract)"""
+    return pages.get(page_num, {}).get(pdf_extract.TEXT, "")
+
+
+def extract_section_text(pages, index, section):
+    """Текст всех страниц раздела по индексу page_index"""
+    return "\n".join(extract_page_text(pages, n) for n in index.get(section, []))
+
+
+def parse_pdf_to_json(pdf_path, pages=None, year=2025, index=None):
+    """
+    Основная функция: извлекает данные по страницам и собирает JSON.
+    pages — содержимое страниц из pdf_extract.extract_pdf; если не передано,
+    страницы разделов находятся по заголовкам (page_index.scan) в том же
+    проходе, что извлекает их текст.
+    index — индекс разделов; по умолчанию найденный по заголовкам, а для
+    переданных pages — стандартная раскладка page_index.DEFAULT_INDEX.
+    """
+    if pages is None and index is None:
+        parts = {section: (pdf_extract.TEXT,) for section in page_index.SECTIONS}
+        index, pages = page_index.scan(pdf_path, parts)
+    elif pages is None:
+        layout = page_index.layout(index, index, (pdf_extract.TEXT,))
+        pages = pdf_extract.extract_pdf(pdf_path, layout)
+
+    with instrument.stage('description_regex', pdf_path):
+        return parse_pages_to_json(pages, year, index or page_index.DEFAULT_INDEX)
+
+
+def parse_pages_to_json(pages, year=2025, index=page_index.DEFAULT_INDEX):
+    """Разбор текста страниц регулярными выражениями"""
     result = {
-        "year": 2025,
+        "year": year,
         "personal_year": {},
         "personal_day_descriptions": {},
         "day_by_color": {},
@@ -53,73 +78,72 @@ def parse_pdf_to_json(pdf_path):
         "calendar": {}
     }
 
-    with pdfplumber.open(pdf_path) as pdf:
-        # ---------- Страница 10: personal_year ----------
-        page10 = extract_page_text(pdf, 10)
-        if page10:
-            title_match = re.search(r"Год\s+[^\n]+", page10)
-            result["personal_year"]["title"] = title_match.group(0).strip() if title_match else "Не найдено"
-            result["personal_year"]["year_description"] = re.sub(r"^Год\s+[^\n]+\n?", "", page10).strip()
-
-        # ---------- Страницы 6-7: personal_day_descriptions ----------
-        day_text = extract_page_text(pdf, 6) + "\n" + extract_page_text(pdf, 7)
-        day_blocks = re.split(r"\n\s*(?=\d\s|1\s)", day_text)
-        for block in day_blocks:
-            match = re.match(r"(\d)\s*(.+)", block.strip(), re.S)
-            if match:
-                num, desc = match.groups()
-                result["personal_day_descriptions"][num] = desc.strip()
-
-        # ---------- Страница 8: day_by_color ----------
-        page8 = extract_page_text(pdf, 8)
-        colors = {
-            "red": r"Красн\w*[:\-–]\s*(.+)",
-            "orange": r"Оранж\w*[:\-–]\s*(.+)",
-            "green": r"Зел[её]н\w*[:\-–]\s*(.+)"
-        }
-        for key, pattern in colors.items():
-            match = re.search(pattern, page8, re.I)
-            if match:
-                result["day_by_color"][key] = match.group(1).strip()
-
-        # ---------- Страница 9: to_do / not_to_do ----------
-        page9 = extract_page_text(pdf, 9)
-        # to_do
-        todo_matches = re.findall(r"(Понедельник|Вторник|Среда|Четверг|Пятница|Суббота|Воскресенье)\s*[:\-–]\s*([^\n]+)", page9)
-        week_map = {
-            "Понедельник": "mon",
-            "Вторник": "tue",
-            "Среда": "wed",
-            "Четверг": "thu",
-            "Пятница": "fri",
-            "Суббота": "sat",
-            "Воскресенье": "sun"
-        }
-        for day, text in todo_matches:
-            key = week_map.get(day, day)
-            result["to_do"][key] = text.strip()
-
-        # not_to_do
-        nottodo_matches = re.findall(r"Не\s+[^\n]+", page9)
-        if nottodo_matches:
-            for i, day in enumerate(result["to_do"].keys()):
-                result["not_to_do"][day] = nottodo_matches[i] if i < len(nottodo_matches) else ""
-
-        # ---------- Страницы 11–22: calendar ----------
-        for i, month in enumerate([
-            "january", "february", "march", "april", "may", "june",
-            "july", "august", "september", "october", "november", "december"
-        ], start=11):
-            text = extract_page_text(pdf, i)
-            if not text.strip():
-                continue
-            # ищем абзац, начинающийся с "Месяц"
-            match = re.search(r"(Месяц[^\n]+(?:\n.+)+)", text)
-            if match:
-                desc = match.group(1).strip()
-                result["calendar"][month] = {"personal_month_description": desc}
-            else:
-                result["calendar"][month] = {"personal_month_description": text.strip()[:500]}
+    # ---------- Страница 10: personal_year ----------
+    page10 = extract_section_text(pages, index, "personal_year")
+    if page10:
+        title_match = re.search(r"Год\s+[^\n]+", page10)
+        result["personal_year"]["title"] = title_match.group(0).strip() if title_match else "Не найдено"
+        result["personal_year"]["year_description"] = re.sub(r"^Год\s+[^\n]+\n?", "", page10).strip()
+
+    # ---------- Страницы 6-7: personal_day_descriptions ----------
+    day_text = extract_section_text(pages, index, "personal_day_descriptions")
+    day_blocks = re.split(r"\n\s*(?=\d\s|1\s)", day_text)
+    for block in day_blocks:
+        match = re.match(r"(\d)\s*(.+)", block.strip(), re.S)
+        if match:
+            num, desc = match.groups()
+            result["personal_day_descriptions"][num] = desc.strip()
+
+    # ---------- Страница 8: day_by_color ----------
+    page8 = extract_section_text(pages, index, "day_by_color")
+    colors = {
+        "red": r"Красн\w*[:\-–]\s*(.+)",
+        "orange": r"Оранж\w*[:\-–]\s*(.+)",
+        "green": r"Зел[её]н\w*[:\-–]\s*(.+)"
+    }
+    for key, pattern in colors.items():
+        match = re.search(pattern, page8, re.I)
+        if match:
+            result["day_by_color"][key] = match.group(1).strip()
+
+    # ---------- Страница 9: to_do / not_to_do ----------
+    page9 = extract_section_text(pages, index, "to_do")
+    # to_do
+    todo_matches = re.findall(r"(Понедельник|Вторник|Среда|Четверг|Пятница|Суббота|Воскресенье)\s*[:\-–]\s*([^\n]+)", page9)
+    week_map = {
+        "Понедельник": "mon",
+        "Вторник": "tue",
+        "Среда": "wed",
+        "Четверг": "thu",
+        "Пятница": "fri",
+        "Суббота": "sat",
+        "Воскресенье": "sun"
+    }
+    for day, text in todo_matches:
+        key = week_map.get(day, day)
+        result["to_do"][key] = text.strip()
+
+    # not_to_do
+    nottodo_matches = re.findall(r"Не\s+[^\n]+", page9)
+    if nottodo_matches:
+        for i, day in enumerate(result["to_do"].keys()):
+            result["not_to_do"][day] = nottodo_matches[i] if i < len(nottodo_matches) else ""
+
+    # ---------- Страницы 11–22: calendar ----------
+    for month in [
+        "january", "february", "march", "april", "may", "june",
+        "july", "august", "september", "october", "november", "december"
+    ]:
+        text = extract_section_text(pages, index, month)
+        if not text.strip():
+            continue
+        # ищем абзац, начинающийся с "Месяц"
+        match = re.search(r"(Месяц[^\n]+(?:\n.+)+)", text)
+        if match:
+            desc = match.group(1).strip()
+            result["calendar"][month] = {"personal_month_description": desc}
+        else:
+            result["calendar"][month] = {"personal_month_description": text.strip()[:500]}
 
     return result
 